@@ -0,0 +1,79 @@
+# Per-operation latency of the WorkQueue vs. the old list-of-dicts scans.
+#
+#   python benchmarks/bench_queue.py
+#
+# Every operation is timed against queues of 10 to 100k entries. WorkQueue
+# numbers should stay flat across sizes; the list baseline grows linearly.
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import WorkQueue
+
+SIZES = [10, 100, 1_000, 10_000, 100_000]
+ROUNDS = 200
+
+def make_entries(n):
+    return [
+        {'user_id': i, 'name': f"Editor {i}", 'time': 1_700_000_000 + i, 'time_block': "08:00 - 16:00 EST", 'jump_url': ""}
+        for i in range(n)
+    ]
+
+def per_op_ns(fn, rounds=ROUNDS):
+    start = time.perf_counter_ns()
+    for i in range(rounds):
+        fn(i)
+    return (time.perf_counter_ns() - start) / rounds
+
+def bench_work_queue(n):
+    q = WorkQueue(make_entries(n))
+    mid = n // 2
+    results = {}
+    results['contains'] = per_op_ns(lambda i: mid in q)
+    results['get'] = per_op_ns(lambda i: q.get(mid))
+
+    # remove + re-append keeps the size constant between rounds
+    def remove_middle(i):
+        entry = q.remove(mid)
+        q.append(entry)
+    results['remove'] = per_op_ns(remove_middle)
+
+    def pop_head(i):
+        q.append(q.popleft())
+    results['popleft'] = per_op_ns(pop_head)
+    return results
+
+def bench_list(n):
+    q = make_entries(n)
+    mid = n // 2
+    results = {}
+    results['contains'] = per_op_ns(lambda i: any(item['user_id'] == mid for item in q), rounds=20)
+    results['get'] = per_op_ns(lambda i: next((item for item in q if item['user_id'] == mid), None), rounds=20)
+
+    def remove_middle(i):
+        nonlocal q
+        entry = next(item for item in q if item['user_id'] == mid)
+        q = [item for item in q if item['user_id'] != mid]
+        q.append(entry)
+    results['remove'] = per_op_ns(remove_middle, rounds=20)
+
+    def pop_head(i):
+        q.append(q.pop(0))
+    results['popleft'] = per_op_ns(pop_head, rounds=20)
+    return results
+
+def main():
+    ops = ['contains', 'get', 'remove', 'popleft']
+    header = f"{'impl':<10}{'size':>9}" + "".join(f"{op:>12}" for op in ops)
+    print("per-operation latency (ns)")
+    print(header)
+    print("-" * len(header))
+    for impl, fn in (("WorkQueue", bench_work_queue), ("list", bench_list)):
+        for n in SIZES:
+            res = fn(n)
+            print(f"{impl:<10}{n:>9}" + "".join(f"{res[op]:>12.0f}" for op in ops))
+
+if __name__ == "__main__":
+    main()
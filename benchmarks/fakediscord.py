@@ -0,0 +1,242 @@
+# In-process stand-ins for the Discord objects the bot's handlers touch, for
+# the offline stress and load tests. Every API call goes through a FakeRest,
+# which sleeps for a random latency and can answer with a 429: like
+# discord.py, the call then waits out retry_after and tries again, so
+# handlers only see the extra delay. Nothing here opens a connection.
+import asyncio
+import itertools
+import random
+from collections import Counter
+
+import discord
+
+_ids = itertools.count(10_000)
+
+class FakeRest:
+    def __init__(self, latency=0.003, rate_limit_rate=0.0, retry_after=0.25):
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.calls = Counter() # route -> requests, including retried ones
+        self.rate_limited = Counter() # route -> 429s answered
+
+    async def call(self, route):
+        while True:
+            self.calls[route] += 1
+            await asyncio.sleep(random.uniform(0, self.latency))
+            if random.random() >= self.rate_limit_rate:
+                return
+            self.rate_limited[route] += 1
+            await asyncio.sleep(self.retry_after)
+
+rest = FakeRest()
+
+class FakeHTTPResponse:
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+class FakeRole:
+    def __init__(self, role_id, name):
+        self.id = role_id
+        self.name = name
+
+class FakePermissions:
+    def __init__(self, administrator=False):
+        self.administrator = administrator
+
+async def _dm(user, content):
+    await rest.call("dm")
+    if user.dms_closed:
+        raise discord.Forbidden(FakeHTTPResponse(403, "Forbidden"), "Cannot send messages to this user")
+    user.dms.append(content)
+
+class FakeUser:
+    bot = False
+
+    def __init__(self, user_id, bot=False, dms_closed=False):
+        self.id = user_id
+        self.bot = bot
+        self.name = f"user{user_id}"
+        self.display_name = f"Editor {user_id}"
+        self.mention = f"<@{user_id}>"
+        self.dms_closed = dms_closed
+        self.dms = []
+
+    async def send(self, content=None, **kwargs):
+        await _dm(self, content)
+
+class FakeMember(discord.Member):
+    # discord.Member exposes these as read-only properties; class attributes
+    # here shadow them so each fake can hold its own values
+    id = name = display_name = mention = guild = roles = guild_permissions = None
+    bot = False
+
+    def __init__(self, user_id, guild, roles=(), dms_closed=False):
+        self.id = user_id
+        self.guild = guild
+        self.name = f"user{user_id}"
+        self.display_name = f"Editor {user_id}"
+        self.mention = f"<@{user_id}>"
+        self.roles = list(roles)
+        self.guild_permissions = FakePermissions()
+        self.dms_closed = dms_closed
+        self.dms = []
+
+    async def send(self, content=None, **kwargs):
+        await _dm(self, content)
+
+BOT_USER = FakeUser(1, bot=True)
+
+class FakeMessage:
+    def __init__(self, channel, author, content="", embeds=()):
+        self.id = next(_ids)
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.embeds = list(embeds)
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{self.id}"
+
+    async def reply(self, content=None, **kwargs):
+        return await self.channel.send(content)
+
+    async def delete(self, delay=None):
+        await rest.call("message:delete")
+
+    async def edit(self, **kwargs):
+        await rest.call("message:edit")
+        self.content = kwargs.get('content', self.content)
+
+class FakeChannel:
+    def __init__(self, guild, name="general"):
+        self.id = next(_ids)
+        self.guild = guild
+        self.name = name
+        self.mention = f"<#{self.id}>"
+        self.messages = []
+        self._by_id = {}
+
+    def _post(self, author, content=None, embeds=()):
+        msg = FakeMessage(self, author, content, embeds)
+        self.messages.append(msg)
+        self._by_id[msg.id] = msg
+        return msg
+
+    async def send(self, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await rest.call(f"channel:{self.name}:send")
+        return self._post(BOT_USER, content, embeds or ([embed] if embed else []))
+
+    async def fetch_message(self, message_id):
+        await rest.call("message:fetch")
+        msg = self._by_id.get(message_id)
+        if msg is None:
+            raise discord.NotFound(FakeHTTPResponse(404, "Not Found"), "Unknown Message")
+        return msg
+
+class FakeGuild:
+    def __init__(self):
+        self.id = next(_ids)
+        self.name = f"Guild {self.id}"
+        self.channel = FakeChannel(self, "queue")
+        self.log_channel = FakeChannel(self, "logs")
+        self.members = {}
+
+    def add_member(self, member):
+        self.members[member.id] = member
+        return member
+
+    def get_channel(self, channel_id):
+        return {self.channel.id: self.channel, self.log_channel.id: self.log_channel}.get(channel_id)
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, embed=None, ephemeral=False, view=None, **kwargs):
+        await rest.call("interaction:respond")
+        self._done = True
+        self._interaction.view = view
+        self._interaction._original = FakeMessage(self._interaction.channel, BOT_USER, content, [embed] if embed else [])
+        if not ephemeral:
+            self._interaction.channel.messages.append(self._interaction._original)
+            self._interaction.channel._by_id[self._interaction._original.id] = self._interaction._original
+
+    async def defer(self, **kwargs):
+        await rest.call("interaction:respond")
+        self._done = True
+
+    async def edit_message(self, content=None, embed=None, view=None, **kwargs):
+        await rest.call("interaction:respond")
+        self._done = True
+        self._interaction.view = view
+        if embed is not None:
+            self._interaction._original = FakeMessage(self._interaction.channel, BOT_USER, content, [embed])
+
+    async def send_modal(self, modal):
+        await rest.call("interaction:respond")
+        self._done = True
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, embed=None, ephemeral=False, **kwargs):
+        await rest.call("interaction:followup")
+        return FakeMessage(self._interaction.channel, BOT_USER, content, [embed] if embed else [])
+
+class FakeInteraction:
+    type = discord.InteractionType.application_command
+    command = None
+
+    def __init__(self, user, guild, channel=None):
+        self.id = next(_ids)
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = channel or guild.channel
+        self.message = None
+        self.view = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self._original = None
+
+    async def original_response(self):
+        await rest.call("interaction:original")
+        return self._original
+
+class FakeEmoji:
+    def __init__(self, name):
+        self.name = name
+
+class FakeReactionPayload:
+    def __init__(self, member, message, emoji_name):
+        self.user_id = member.id
+        self.member = member
+        self.guild_id = message.guild.id
+        self.channel_id = message.channel.id
+        self.message_id = message.id
+        self.emoji = FakeEmoji(emoji_name)
+
+async def no_prefix_commands(message):
+    pass
+
+def install(bot, guilds):
+    # Points the bot's cache lookups at the fakes and switches off prefix
+    # command parsing (it needs a live connection state)
+    channels = {c.id: c for g in guilds for c in (g.channel, g.log_channel)}
+    by_id = {g.id: g for g in guilds}
+    bot.get_guild = by_id.get
+    bot.get_channel = channels.get
+    bot.process_commands = no_prefix_commands
+    try:
+        bot.user = BOT_USER
+    except AttributeError:
+        bot._connection.user = BOT_USER # discord.py: Client.user is read-only
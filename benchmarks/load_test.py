@@ -0,0 +1,276 @@
+# End-to-end load test against in-process Discord stand-ins (fakediscord.py).
+#
+#   python benchmarks/load_test.py [--guilds 2] [--editors 300] [--swcs 5] [--ops 5000]
+#                                  [--concurrency 200] [--latency-ms 20] [--rate-limit 0.01]
+#                                  [--retry-after-ms 250] [--dms-closed 0.05]
+#                                  [--mix available=40,assign=10,reaction=15,optout=19,queue=15,reset=1]
+#                                  [--seed N] [--json]
+#
+# Drives the real /available, /assign, emoji reaction, /optout, /queue and
+# /resetqueue handlers (plus /queue page flips) with up to --concurrency operations in
+# flight, every Discord call going through a simulated REST layer with random
+# latency and a --rate-limit share of 429s. Runs entirely offline, in a temp
+# directory. Reports throughput, per-operation latency percentiles, API calls
+# per route and queue-consistency violations:
+#   - join/removal mismatch: announced joins minus opt-outs, assignments
+#     taken from the queue and resets that found the editor queued (from
+#     replaying the audit log up to each reset) must equal final queue
+#     membership (0 or 1)
+#   - resets: every confirmed /resetqueue has its audit event
+#   - persistence: the queue reloaded from disk equals the in-memory queue
+#   - audit log: replaying the recorded events rebuilds the in-memory queue
+# Exits non-zero if any violation is found.
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.chdir(tempfile.mkdtemp(prefix="fdbot-load-")) # keep state files out of the repo
+
+import main
+from fakediscord import (FakeGuild, FakeInteraction, FakeMember, FakeReactionPayload, FakeRole,
+                         install, rest)
+
+OPERATIONS = ("available", "assign", "reaction", "optout", "queue", "reset")
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.guilds = [FakeGuild() for _ in range(args.guilds)]
+        self.editors = {}
+        self.swcs = {}
+        swc_role = FakeRole(main.SWC_ROLE_IDS[0], main.SWC_ROLE_NAME)
+        for guild in self.guilds:
+            self.editors[guild.id] = [guild.add_member(FakeMember(100 + i, guild, dms_closed=random.random() < args.dms_closed))
+                                      for i in range(args.editors)]
+            self.swcs[guild.id] = [guild.add_member(FakeMember(90 - i, guild, roles=[swc_role])) for i in range(args.swcs)]
+        self.announcements = defaultdict(list) # guild_id -> recent "available" messages
+        self.joins = Counter() # (guild_id, user_id) -> announced joins
+        self.optouts = Counter() # (guild_id, user_id) -> confirmed opt-outs
+        self.resets = Counter() # guild_id -> confirmed resets
+        self.latencies = defaultdict(list) # operation -> seconds
+        self.errors = Counter()
+
+    async def available(self, guild):
+        user = random.choice(self.editors[guild.id])
+        block = random.choice(main.TIME_BLOCK_CHOICES)
+        interaction = FakeInteraction(user, guild)
+        await main.available.callback(interaction, block)
+        msg = interaction._original
+        if msg and "is available for a file" in (msg.content or ""):
+            self.joins[guild.id, user.id] += 1
+            self.announcements[guild.id].append(msg)
+            del self.announcements[guild.id][:-50]
+
+    async def assign(self, guild):
+        swc = random.choice(self.swcs[guild.id])
+        member = random.choice(self.editors[guild.id])
+        file_type = random.choice(main.FILE_CHOICES)
+        await main.assign.callback(FakeInteraction(swc, guild), member, file_type)
+
+    async def reaction(self, guild):
+        if not self.announcements[guild.id]:
+            return await self.available(guild)
+        msg = random.choice(self.announcements[guild.id])
+        swc = random.choice(self.swcs[guild.id])
+        await main.on_raw_reaction_add(FakeReactionPayload(swc, msg, random.choice(list(main.EMOJI_MAP))))
+
+    async def optout(self, guild):
+        user = random.choice(self.editors[guild.id])
+        interaction = FakeInteraction(user, guild)
+        await main.optout.callback(interaction)
+        if interaction._original and interaction._original.content.startswith("You have removed"):
+            self.optouts[guild.id, user.id] += 1
+
+    async def queue(self, guild):
+        interaction = FakeInteraction(random.choice(self.swcs[guild.id]), guild)
+        block = random.choice([None] + main.TIME_BLOCK_CHOICES)
+        await main.show_queue.callback(interaction, block, 1)
+        view = interaction.view
+        if view is not None and random.random() < 0.5:
+            click = FakeInteraction(interaction.user, guild)
+            await view.show(click, view.page + 1)
+
+    async def reset(self, guild):
+        interaction = FakeInteraction(random.choice(self.swcs[guild.id]), guild)
+        await main.reset_queue.callback(interaction)
+        if interaction._original and "has been reset" in interaction._original.content:
+            self.resets[guild.id] += 1
+
+    async def timed(self, name, guild):
+        started = time.perf_counter()
+        try:
+            await getattr(self, name)(guild)
+        except Exception as e:
+            self.errors[f"{name}: {type(e).__name__}: {e}"] += 1
+        self.latencies[name].append(time.perf_counter() - started)
+
+    async def drive(self, mix):
+        names, weights = zip(*mix.items())
+        limit = asyncio.Semaphore(self.args.concurrency)
+
+        async def one():
+            async with limit:
+                await self.timed(random.choices(names, weights)[0], random.choice(self.guilds))
+
+        await asyncio.gather(*(one() for _ in range(self.args.ops)))
+
+    def reset_removals(self, events):
+        # (guild_id, user_id) -> resets that found the editor queued, from
+        # replaying the audit log up to each reset
+        removed = Counter()
+        for i, event in enumerate(events):
+            if event['event'] == 'reset':
+                queues, _ = main.replay_audit(events[:i])
+                for entry in queues.get(event['guild_id'], ()):
+                    removed[event['guild_id'], entry['user_id']] += 1
+        return removed
+
+    def check(self):
+        violations = []
+        events = list(main.read_audit_events())
+        reset_removals = self.reset_removals(events)
+        audited_resets = Counter(e['guild_id'] for e in events if e['event'] == 'reset')
+        for guild in self.guilds:
+            if audited_resets[guild.id] != self.resets[guild.id]:
+                violations.append(f"{self.resets[guild.id]} confirmed reset(s) but {audited_resets[guild.id]} "
+                                  f"audit event(s) for guild {guild.id}")
+            queue = main.storage.queue_for(guild.id)
+            assigned_from_queue = Counter()
+            for embed in (e for msg in guild.log_channel.messages for e in msg.embeds):
+                if embed.title == "File Assigned" and embed.footer.text == "Was in queue: True":
+                    assigned_from_queue[embed.fields[0].value] += 1
+            for member in self.editors[guild.id]:
+                key = (guild.id, member.id)
+                queued = member.id in queue
+                removals = self.optouts[key] + assigned_from_queue[member.mention] + reset_removals[key]
+                if self.joins[key] - removals != int(queued):
+                    violations.append(f"join/removal mismatch: guild {guild.id} editor {member.id} "
+                                      f"({self.joins[key]} joins, {removals} removals, queued={queued})")
+
+        reloaded = main.create_storage()
+        reloaded.load()
+        replayed, _ = main.replay_audit(events)
+        for guild in self.guilds:
+            live = main.storage.queue_for(guild.id).to_list()
+            if live != reloaded.queue_for(guild.id).to_list():
+                violations.append(f"persisted queue differs from memory for guild {guild.id}")
+            if live != replayed.get(guild.id, main.WorkQueue()).to_list():
+                violations.append(f"audit log replay differs from memory for guild {guild.id}")
+        return violations
+
+    def report(self, elapsed, violations):
+        ops = {}
+        for name, values in self.latencies.items():
+            values.sort()
+            ops[name] = {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 0.5) * 1000, 2),
+                'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        return {
+            'operations': sum(len(v) for v in self.latencies.values()),
+            'elapsed_s': round(elapsed, 3),
+            'throughput_ops_s': round(sum(len(v) for v in self.latencies.values()) / elapsed, 1),
+            'latency': ops,
+            'api_calls': dict(rest.calls.most_common()),
+            'rate_limited': dict(rest.rate_limited.most_common()),
+            'errors': dict(self.errors),
+            'violations': violations,
+        }
+
+def print_report(result):
+    print(f"{result['operations']} operations in {result['elapsed_s']:.2f}s "
+          f"({result['throughput_ops_s']:.0f} ops/s)")
+    print(f"\n{'operation':<12}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in sorted(result['latency'].items()):
+        print(f"{name:<12}{row['count']:>8}{row['p50_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}")
+    print(f"\nAPI calls: {sum(result['api_calls'].values())} ({sum(result['rate_limited'].values())} answered 429)")
+    for route, count in result['api_calls'].items():
+        limited = result['rate_limited'].get(route, 0)
+        print(f"  {route:<28}{count:>8}" + (f"  ({limited} x 429)" if limited else ""))
+    for error, count in result['errors'].items():
+        print(f"error x{count}: {error}")
+    if result['violations']:
+        print(f"\n{len(result['violations'])} violation(s):")
+        for v in result['violations'][:20]:
+            print(f"  {v}")
+    else:
+        print("\nno violations")
+
+async def run(args, mix):
+    # With --json, the bot's own prints go to stderr so stdout stays parseable
+    with contextlib.redirect_stdout(sys.stderr) if args.json else contextlib.nullcontext():
+        result = await load(args, mix)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+    return 1 if result['violations'] or result['errors'] else 0
+
+async def load(args, mix):
+    main.load_data()
+    main.persistence.interval = 0.05
+    main.persistence.start()
+    test = LoadTest(args)
+    install(main.bot, test.guilds)
+    for guild in test.guilds:
+        main.storage.set_guild_config(guild.id, {'availability': guild.log_channel.id, 'assignment': guild.log_channel.id})
+        main.storage.set_guild_setting(guild.id, 'join_cooldown', args.cooldown)
+
+    started = time.perf_counter()
+    await test.drive(mix)
+    elapsed = time.perf_counter() - started
+    await main.log_batcher.close()
+    await main.persistence.close()
+    return test.report(elapsed, test.check())
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}; expected one of {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline end-to-end load test")
+    parser.add_argument("--guilds", type=int, default=2)
+    parser.add_argument("--editors", type=int, default=300, help="editors per guild")
+    parser.add_argument("--swcs", type=int, default=5, help="SWCs per guild")
+    parser.add_argument("--ops", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="max simulated REST latency")
+    parser.add_argument("--rate-limit", type=float, default=0.01, help="share of REST calls answered with a 429")
+    parser.add_argument("--retry-after-ms", type=float, default=250.0)
+    parser.add_argument("--dms-closed", type=float, default=0.05, help="share of editors with DMs closed")
+    parser.add_argument("--cooldown", type=int, default=0, help="join cooldown in seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("available=40,assign=10,reaction=15,optout=19,queue=15,reset=1"))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    rest.latency = args.latency_ms / 1000
+    rest.rate_limit_rate = args.rate_limit
+    rest.retry_after = args.retry_after_ms / 1000
+    if args.seed is not None:
+        random.seed(args.seed)
+    sys.exit(asyncio.run(run(args, args.mix)))
@@ -0,0 +1,267 @@
+# Microbenchmarks for the hot pure functions and for queue persistence.
+#
+#   python benchmarks/microbench.py [--output microbench.json] [--compare OLD.json]
+#                                   [--threshold 0.10] [--sizes 1000,10000,100000]
+#                                   [--backend json|sqlite] [--filter NAME] [--repeat 5]
+#
+# Times parse_audio_time, format_seconds, calculate_tats, check_swc_role
+# (members holding 1 to 250 roles), log routing (LogRouter.resolve, cached and
+# rebuilt, and a full send_log), and storage.save_queue() + the write it
+# queues / load_data() + the first queue read for a guild with 1k, 10k and
+# 100k queue entries. Each case runs a fixed number of rounds, repeated; the
+# median and minimum per-operation time are written as JSON together with
+# the git commit and Python version, so runs can be compared across commits.
+#
+# --compare prints each case's change against an earlier results file and
+# exits non-zero if any case got slower by more than --threshold (10% by
+# default). Minimum times are compared, as the least noisy figure; even so,
+# only compare runs from the same machine.
+# The SQLite backend has no snapshot to save; only load is timed there.
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+START_DIR = os.getcwd()
+os.chdir(tempfile.mkdtemp(prefix="fdbot-microbench-")) # keep state files out of the repo
+
+import discord
+import main
+from fakediscord import FakeGuild, FakeMember, FakeRole, install, rest
+
+SIZES = [1_000, 10_000, 100_000]
+ROLE_COUNTS = [1, 50, 250] # 250 is Discord's per-guild role limit
+REPEAT = 5
+# One loop for every async case: the log batcher's locks stay bound to the
+# loop they were first used on
+loop = asyncio.new_event_loop()
+
+def per_op_ns(fn, number, repeat=REPEAT):
+    # fn(number) runs the operation `number` times; returns ns per operation per run
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        fn(number)
+        runs.append((time.perf_counter_ns() - started) / number)
+    return runs
+
+def loop_of(op):
+    def run(number):
+        for _ in range(number):
+            op()
+    return run
+
+def make_entries(n):
+    return [
+        {'user_id': i, 'name': f"Editor {i}", 'time': 1_700_000_000 + i, 'time_block': "08:00 - 16:00 EST",
+         'jump_url': f"https://discord.com/channels/1/2/{i}"}
+        for i in range(n)
+    ]
+
+# --- pure functions ---
+
+def bench_parse_audio_time():
+    cases = {}
+    for label, text in (("hms", " 1:23:45 "), ("ms", "45:10"), ("invalid", "1h 20m")):
+        cases[f"parse_audio_time[{label}]"] = (loop_of(lambda text=text: main.parse_audio_time(text)), 100_000)
+    return cases
+
+def bench_format_seconds():
+    return {
+        "format_seconds[zero]": (loop_of(lambda: main.format_seconds(0)), 100_000),
+        "format_seconds[float]": (loop_of(lambda: main.format_seconds(5025.5)), 100_000),
+    }
+
+def bench_calculate_tats():
+    guild_id = 424242
+    main.storage.set_guild_setting(guild_id, 'tat_rules', {"AIERA LIVE FILE": {"FR": 0.75, "SV": 2.0, "OVERALL": 3.0}})
+    return {
+        "calculate_tats[default]": (loop_of(lambda: main.calculate_tats("AIERA BATCH FILE", 3600)), 50_000),
+        "calculate_tats[fixed]": (loop_of(lambda: main.calculate_tats("HP FILE", 3600)), 50_000),
+        "calculate_tats[guild_override]": (loop_of(lambda: main.calculate_tats("AIERA LIVE FILE", 3600, guild_id)), 50_000),
+    }
+
+def bench_check_swc_role():
+    guild = FakeGuild()
+    cases = {}
+    for count in ROLE_COUNTS:
+        roles = [FakeRole(1000 + i, f"Role {i}") for i in range(count)]
+        # Worst case: no SWC role, so both the id and the name scan run to the end
+        editor = FakeMember(1, guild, roles=roles)
+        # SWC role matched by name as the last role (ids don't match)
+        by_name = FakeMember(2, guild, roles=roles[:-1] + [FakeRole(7, main.SWC_ROLE_NAME)])
+        cases[f"check_swc_role[{count} roles,no match]"] = (loop_of(lambda m=editor: main.check_swc_role(m)), 20_000)
+        cases[f"check_swc_role[{count} roles,name match]"] = (loop_of(lambda m=by_name: main.check_swc_role(m)), 20_000)
+    cases["check_swc_role[not a member]"] = (loop_of(lambda: main.check_swc_role(object())), 100_000)
+    return cases
+
+# --- log routing ---
+
+def bench_log_routing():
+    guild = FakeGuild()
+    install(main.bot, [guild])
+    main.storage.set_guild_config(guild.id, {'assignment': guild.log_channel.id, 'availability': guild.log_channel.id})
+    router = main.log_router
+    embed = discord.Embed(title="File Assigned")
+    rest.latency = 0
+
+    def rebuilt(number):
+        for _ in range(number):
+            router.invalidate(guild.id)
+            router.resolve(guild, "assignment")
+
+    def send_log(number):
+        # Embed-only logs: route lookup + batch buffer, no API call on this path
+        async def go():
+            for _ in range(number):
+                await main.send_log(guild, "assignment", embed=embed)
+            await main.log_batcher.close()
+        loop.run_until_complete(go())
+
+    router.resolve(guild, "assignment")
+    return {
+        "log_router.resolve[cached]": (loop_of(lambda: router.resolve(guild, "assignment")), 100_000),
+        "log_router.resolve[unrouted]": (loop_of(lambda: router.resolve(guild, "tatdelay")), 100_000),
+        "log_router.resolve[rebuilt]": (rebuilt, 10_000),
+        "send_log[embed]": (send_log, 10_000),
+    }
+
+# --- persistence ---
+
+def quiet(fn):
+    # load_data() and journal replay report on stdout
+    def run(*args):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn(*args)
+    return run
+
+def bench_persistence(backend, sizes):
+    # Each size gets its own directory; a case switches into it (and to its
+    # storage) when it runs, since state paths are relative
+    cases = {}
+    guild_id = 1
+    for n in sizes:
+        directory = tempfile.mkdtemp(prefix=f"n{n}-", dir=os.getcwd())
+        os.chdir(directory)
+        storage = main.storage = main.create_storage(backend)
+        quiet(main.load_data)()
+        for entry in make_entries(n):
+            storage.join(guild_id, entry)
+        if hasattr(storage, 'save_queue'):
+            storage.save_queue(guild_id)
+        main.persistence.flush_sync()
+        os.chdir("..")
+
+        def save(number, directory=directory, storage=storage):
+            os.chdir(directory)
+            main.storage = storage
+            for _ in range(number):
+                storage.save_queue(guild_id)
+                main.persistence.flush_sync()
+            os.chdir("..")
+
+        def load(number, directory=directory, n=n):
+            os.chdir(directory)
+            for _ in range(number):
+                main.storage = main.create_storage(backend)
+                main.load_data()
+                if len(main.storage.queue_for(guild_id)) != n:
+                    raise RuntimeError(f"loaded {len(main.storage.queue_for(guild_id))} entries, expected {n}")
+            os.chdir("..")
+
+        rounds = 1 if n >= 100_000 else 3
+        if hasattr(storage, 'save_queue'):
+            cases[f"save_queue[{backend},{n}]"] = (save, rounds)
+        cases[f"load_data[{backend},{n}]"] = (quiet(load), rounds)
+    return cases
+
+# --- runner ---
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(args):
+    groups = [bench_parse_audio_time, bench_format_seconds, bench_calculate_tats, bench_check_swc_role, bench_log_routing]
+    results = {}
+    for group in groups + [lambda: bench_persistence(args.backend, args.sizes)]:
+        for name, (fn, number) in group().items():
+            if args.filter and args.filter not in name:
+                continue
+            runs = per_op_ns(fn, number, args.repeat)
+            results[name] = {'median_ns': round(statistics.median(runs), 1), 'min_ns': round(min(runs), 1),
+                             'number': number, 'repeat': len(runs)}
+            print(f"{name:<48}{format_ns(results[name]['median_ns']):>12}{format_ns(results[name]['min_ns']):>12}")
+    return {
+        'commit': git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+def format_ns(ns):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+def compare(old, new, threshold):
+    # Returns the names of cases slower than `threshold` (a fraction)
+    print(f"\nchange vs {(old.get('commit') or 'unknown')[:10]} (min, {threshold:.0%} threshold)")
+    regressions = []
+    for name, result in new['results'].items():
+        before = old['results'].get(name)
+        if before is None:
+            print(f"  {name:<48}{'new':>10}")
+            continue
+        change = result['min_ns'] / before['min_ns'] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  slower"
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {name:<48}{change:>+10.1%}{flag}")
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for hot functions and persistence")
+    parser.add_argument("--output", default="microbench.json", help="results file (JSON)")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=SIZES, help="queue sizes for persistence")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default=main.STORAGE_BACKEND)
+    parser.add_argument("--filter", default=None, help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="runs per case (more runs, steadier minimums)")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    output = os.path.join(START_DIR, args.output)
+    baseline = None
+    if args.compare:
+        with open(os.path.join(START_DIR, args.compare)) as f:
+            baseline = json.load(f)
+
+    print(f"{'case':<48}{'median':>12}{'min':>12}")
+    result = run(args)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nwrote {output}")
+    if baseline is not None and compare(baseline, result, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,180 @@
+# Concurrency stress test for the queue handlers.
+#
+#   python benchmarks/stress_queue.py [--guilds 2] [--editors 200] [--rounds 15] [--latency-ms 3]
+#
+# Runs the real /available, text "available", /optout and assign_logic code
+# paths concurrently against in-process stand-ins for Discord objects whose
+# API calls sleep for a random latency, so handlers interleave at every await.
+# The same editor ids are used in every guild to catch cross-guild leaks.
+#
+# Checks, per (guild, editor):
+#   - lost removals: an editor still queued although an assignment/opt-out
+#     started after their last join request started (checked once after a
+#     shift-start burst of /available + assignments, and again at the end)
+#   - duplicate joins: successful join acknowledgements minus successful
+#     removals must equal final queue membership (0 or 1)
+#   - persistence: the queue reloaded from disk equals the in-memory queue
+#   - audit log: replaying the recorded events rebuilds the in-memory queue
+# Exits non-zero if any violation is found.
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.chdir(tempfile.mkdtemp(prefix="fdbot-stress-")) # keep queue files out of the repo
+
+from discord import app_commands
+import main
+from fakediscord import FakeGuild, FakeInteraction, FakeMessage, FakeUser, install, rest
+
+class Stress:
+    def __init__(self, guilds, editors, rounds):
+        self.guilds = [FakeGuild() for _ in range(guilds)]
+        self.users = {g.id: [FakeUser(100 + i) for i in range(editors)] for g in self.guilds}
+        self.rounds = rounds
+        self.clock = itertools.count()
+        self.last_join_start = defaultdict(lambda: -1)
+        self.last_removal_start = defaultdict(lambda: -1)
+        self.optouts_ok = defaultdict(int)
+
+    async def slash_available(self, guild, user):
+        self.last_join_start[guild.id, user.id] = next(self.clock)
+        choice = app_commands.Choice(name="08:00 - 16:00 EST", value="08:00 - 16:00 EST")
+        await main.available.callback(FakeInteraction(user, guild), choice)
+
+    async def text_available(self, guild, user):
+        self.last_join_start[guild.id, user.id] = next(self.clock)
+        await main.on_message(FakeMessage(guild.channel, user, "available"))
+
+    async def optout(self, guild, user):
+        self.last_removal_start[guild.id, user.id] = next(self.clock)
+        interaction = FakeInteraction(user, guild)
+        await main.optout.callback(interaction)
+        if interaction._original and interaction._original.content.startswith("You have removed"):
+            self.optouts_ok[guild.id, user.id] += 1
+
+    async def assign(self, guild, swc):
+        user = random.choice(self.users[guild.id])
+        self.last_removal_start[guild.id, user.id] = next(self.clock)
+        await main.assign_logic(user, "AIERA LIVE FILE", guild.channel, swc)
+
+    async def churn(self, guild, user):
+        for _ in range(self.rounds):
+            op = random.random()
+            if op < 0.7:
+                await self.text_available(guild, user)
+            else:
+                await self.optout(guild, user)
+
+    async def coordinators(self, guild, count):
+        # Assignments (reactions, /assign, context menu) from many SWCs at once
+        swc = FakeUser(2)
+        assignments = []
+        for _ in range(count):
+            assignments.append(asyncio.create_task(self.assign(guild, swc)))
+            await asyncio.sleep(random.uniform(0, rest.latency / 4))
+        await asyncio.gather(*assignments)
+
+    def check(self):
+        violations = []
+        for guild in self.guilds:
+            queue = main.storage.queue_for(guild.id)
+            assigned_from_queue = defaultdict(int)
+            for embed in (e for msg in guild.log_channel.messages for e in msg.embeds):
+                if embed.title == "File Assigned" and embed.footer.text == "Was in queue: True":
+                    assigned_from_queue[embed.fields[0].value] += 1
+            for user in self.users[guild.id]:
+                key = (guild.id, user.id)
+                queued = user.id in queue
+                if queued and self.last_removal_start[key] > self.last_join_start[key]:
+                    violations.append(f"lost removal: guild {guild.id} editor {user.id}")
+                joins = sum(1 for dm in user.dms if dm and "You are added to the queue" in dm)
+                removals = self.optouts_ok[key] + assigned_from_queue[user.mention]
+                if joins - removals != int(queued):
+                    violations.append(f"join/removal mismatch: guild {guild.id} editor {user.id} ({joins} joins, {removals} removals, queued={queued})")
+        return violations
+
+async def run(args):
+    main.load_data()
+    main.persistence.interval = 0.05
+    main.persistence.start()
+    stress = Stress(args.guilds, args.editors, args.rounds)
+    install(main.bot, stress.guilds)
+    for guild in stress.guilds:
+        main.storage.set_guild_config(guild.id, {'availability': guild.log_channel.id, 'assignment': guild.log_channel.id})
+        main.storage.set_guild_setting(guild.id, 'join_cooldown', 0) # editors rejoin constantly here
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    # Phase 1: shift start. Every editor runs /available once while coordinators
+    # hand out files; each editor's last operation happens here, so the queue at
+    # the end of the phase must reflect every assignment that raced a join.
+    tasks = []
+    for guild in stress.guilds:
+        tasks += [stress.slash_available(guild, user) for user in stress.users[guild.id]]
+        tasks.append(stress.coordinators(guild, args.editors // 2))
+    await asyncio.gather(*tasks)
+    await main.log_batcher.close()
+    violations = stress.check()
+
+    # Phase 2: churn. Repeated text joins, opt-outs and assignments.
+    tasks = []
+    for guild in stress.guilds:
+        tasks += [stress.churn(guild, user) for user in stress.users[guild.id]]
+        tasks.append(stress.coordinators(guild, args.rounds * args.editors // 5))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - start
+    await main.log_batcher.close()
+    await main.persistence.close()
+
+    violations += stress.check()
+
+    reloaded = main.create_storage()
+    reloaded.load()
+    for guild in stress.guilds:
+        live = main.storage.queue_for(guild.id).to_list()
+        disk = reloaded.queue_for(guild.id).to_list()
+        if live != disk:
+            violations.append(f"persisted queue differs from memory for guild {guild.id}")
+    replayed, _ = main.replay_audit(main.read_audit_events())
+    for guild in stress.guilds:
+        if main.storage.queue_for(guild.id).to_list() != replayed.get(guild.id, main.WorkQueue()).to_list():
+            violations.append(f"audit log replay differs from memory for guild {guild.id}")
+
+    ops = next(stress.clock)
+    print(f"{ops} operations across {args.guilds} guild(s) in {elapsed:.2f}s")
+    for guild in stress.guilds:
+        print(f"guild {guild.id}: {len(main.storage.queue_for(guild.id))} queued at end")
+    print(main.outbound.report())
+    print(f"log embeds: {main.log_batcher.embeds} in {main.log_batcher.messages} message(s)")
+    if violations:
+        print(f"{len(violations)} violation(s):")
+        for v in violations[:20]:
+            print(f"  {v}")
+        return 1
+    print("no violations")
+    return 0
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guilds", type=int, default=2)
+    parser.add_argument("--editors", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--latency-ms", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=None)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    rest.latency = args.latency_ms / 1000
+    if args.seed is not None:
+        random.seed(args.seed)
+    sys.exit(asyncio.run(run(args)))
@@ -1,27 +1,413 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, ui
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 import json
-from flask import Flask
-from threading import Thread
+import csv
+import io
+import sqlite3
+import gzip
+import shutil
+import uuid
+import heapq
+import time
+import math
+import traceback
+import functools
+import contextvars
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from itertools import islice
+from urllib.request import pathname2url
+from aiohttp import web
 import asyncio
 
-# --- KEEP ALIVE SECTION ---
-app = Flask('')
+# --- HEALTH SERVER ---
+# Keep-alive and health endpoints served by aiohttp on the bot's own event loop
+# (no extra thread). "/" answers "I am alive!" for uptime pingers; "/health"
+# reports gateway state, event-loop lag and the persistence backlog as JSON and
+# returns 503 when any of them is out of bounds; "/metrics" serves the metrics
+# registry below in the Prometheus text format.
+HEALTH_PORT = int(os.environ.get("PORT", 8080))
+HEALTH_MAX_LOOP_LAG = 1.0 # seconds
+HEALTH_MAX_BACKLOG = 5000 # unwritten persistence changes
+LOOP_LAG_INTERVAL = 0.5
+
+class HealthServer:
+    def __init__(self, port=HEALTH_PORT):
+        self.port = port
+        self.gateway_connected = False
+        self.disconnects = 0
+        self.loop_lag = 0.0
+        self.max_loop_lag = 0.0
+        self._runner = None
+        self._lag_task = None
+
+    async def start(self):
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/", self.home)
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/metrics", self.metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+        self._lag_task = asyncio.create_task(self._measure_lag())
+
+    async def close(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _measure_lag(self):
+        # How late a short sleep wakes up is how long the loop was blocked
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.loop_lag = max(loop.time() - started - LOOP_LAG_INTERVAL, 0.0)
+            self.max_loop_lag = max(self.max_loop_lag, self.loop_lag)
+
+    def status(self):
+        checks = {
+            'gateway': self.gateway_connected,
+            'loop_lag': self.loop_lag < HEALTH_MAX_LOOP_LAG,
+            'persistence': persistence.backlog < HEALTH_MAX_BACKLOG,
+        }
+        return {
+            'healthy': all(checks.values()),
+            'checks': checks,
+            # bot.latency is inf until the first heartbeat ACK, and Infinity isn't valid JSON
+            'gateway_latency_ms': round(bot.latency * 1000, 1) if self.gateway_connected and math.isfinite(bot.latency) else None,
+            'disconnects': self.disconnects,
+            'loop_lag_ms': round(self.loop_lag * 1000, 1),
+            'max_loop_lag_ms': round(self.max_loop_lag * 1000, 1),
+            'persistence_backlog': persistence.backlog,
+            'persistence_flushes': persistence.flushes,
+            'queue_executor_backlog': queue_executor.backlog,
+        }
+
+    async def home(self, request):
+        return web.Response(text="I am alive!")
+
+    async def health(self, request):
+        status = self.status()
+        return web.json_response(status, status=200 if status['healthy'] else 503)
+
+    async def metrics(self, request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8")
+
+health = HealthServer()
 
-@app.route('/')
-def home():
-    return "I am alive!"
+# --- METRICS ---
+# In-process metrics registry, exported in the Prometheus text format at
+# /metrics on the health server. Counters and latency histograms are updated
+# where things happen; gauges, and counters other components already keep,
+# are read by collector callbacks at scrape time.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
 
-def run():
-    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 8080)))
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
-# ---------------------------
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+class Metrics:
+    def __init__(self):
+        self._meta = {} # name -> (type, help)
+        self._counters = {} # name -> {label key: value}
+        self._histograms = {} # name -> {label key: [per-bucket counts..., sum, count]}
+        self._collectors = {} # name -> callable returning [(labels dict, value), ...]
+
+    def describe(self, name, kind, help_text):
+        self._meta[name] = (kind, help_text)
+
+    def inc(self, name, amount=1, **labels):
+        series = self._counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        series = self._histograms.setdefault(name, {})
+        key = _label_key(labels)
+        values = series.get(key)
+        if values is None:
+            values = series[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                values[i] += 1
+                break
+        values[-2] += seconds
+        values[-1] += 1
+
+    def collect(self, name, kind, help_text, fn):
+        self.describe(name, kind, help_text)
+        self._collectors[name] = fn
+
+    def render(self):
+        lines = []
+        for name in sorted(self._meta.keys() | self._counters.keys() | self._histograms.keys()):
+            kind, help_text = self._meta.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if name in self._histograms:
+                for key, values in self._histograms[name].items():
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS, values):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', str(bound))])} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {values[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {values[-2]}")
+                    lines.append(f"{name}_count{_format_labels(key)} {values[-1]}")
+            for key, value in self._counters.get(name, {}).items():
+                lines.append(f"{name}{_format_labels(key)} {value}")
+            if name in self._collectors:
+                try:
+                    for labels, value in self._collectors[name]():
+                        lines.append(f"{name}{_format_labels(_label_key(labels))} {value}")
+                except Exception as e:
+                    print(f"Metrics collector {name} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+metrics.describe("fdbot_command_seconds", "histogram", "Slash command and context menu run time")
+metrics.describe("fdbot_command_errors_total", "counter", "Slash commands and context menus that raised")
+metrics.describe("fdbot_reaction_assign_seconds", "histogram", "Emoji reaction handling time, by outcome")
+metrics.describe("fdbot_discord_send_seconds", "histogram", "Outbound Discord sends (DMs, assignment and log messages) including time waiting for a slot")
+metrics.describe("fdbot_discord_send_failures_total", "counter", "Outbound Discord sends that raised")
+metrics.describe("fdbot_persistence_flush_seconds", "histogram", "Background writer flushes")
+metrics.describe("fdbot_persistence_failures_total", "counter", "Background writer flushes that failed")
+
+def _queue_depths():
+    return [({'guild': guild_id}, len(queue)) for guild_id, queue in storage.queues.items()]
+
+def _queue_depths_by_block():
+    depths = []
+    for guild_id, queue in storage.queues.items():
+        blocks = {}
+        for entry in queue:
+            block = entry.get('time_block', 'N/A')
+            blocks[block] = blocks.get(block, 0) + 1
+        depths += [({'guild': guild_id, 'time_block': block}, count) for block, count in blocks.items()]
+    return depths
+
+metrics.collect("fdbot_queue_depth", "gauge", "Editors waiting in each guild's queue", _queue_depths)
+metrics.collect("fdbot_queue_depth_by_block", "gauge", "Editors waiting per guild and time block", _queue_depths_by_block)
+metrics.collect("fdbot_persistence_backlog", "gauge", "Changes waiting for the background writer", lambda: [({}, persistence.backlog)])
+metrics.collect("fdbot_persistence_flushes_total", "counter", "Background writer flushes", lambda: [({}, persistence.flushes)])
+metrics.collect("fdbot_queue_executor_backlog", "gauge", "Queue mutations waiting for their guild's worker", lambda: [({}, queue_executor.backlog)])
+metrics.collect("fdbot_backlog_files", "gauge", "Files waiting in each guild's backlog", lambda: [({'guild': g}, len(file_backlog.pending(g))) for g in file_backlog.guild_ids()])
+metrics.collect("fdbot_dispatched_files_total", "counter", "Backlog files assigned automatically", lambda: [({}, dispatcher.dispatched)])
+metrics.collect("fdbot_tracked_records", "gauge", "Open TAT deadlines and receipt confirmations", lambda: [({'kind': kind}, len(records)) for kind, records in storage.tracked.items()])
+metrics.collect("fdbot_tat_alerts_total", "counter", "TAT alerts sent", lambda: [({'alert': 'at_risk'}, deadline_tracker.at_risk), ({'alert': 'breached'}, deadline_tracker.breached)])
+metrics.collect("fdbot_available_index_lookups_total", "counter", "Reaction author lookups in the available-message index", lambda: [({'result': 'hit'}, available_index.hits), ({'result': 'miss'}, available_index.misses)])
+metrics.collect("fdbot_cooldown_rejections_total", "counter", "Queue join requests turned away by the cooldown", lambda: [({'guild': g}, n) for g, n in cooldowns.rejected.items()])
+metrics.collect("fdbot_log_route_misses_total", "counter", "Logs dropped because no channel is routed", lambda: [({'guild': g, 'log_type': t}, n) for (g, t), n in log_router.misses.items()])
+metrics.collect("fdbot_log_batches_total", "counter", "Batched log messages sent", lambda: [({}, log_batcher.messages)])
+metrics.collect("fdbot_queue_page_renders_total", "counter", "/queue pages served from the render cache or rendered", lambda: [({'result': 'cached'}, queue_pages.hits), ({'result': 'rendered'}, queue_pages.misses)])
+metrics.collect("fdbot_loop_lag_seconds", "gauge", "Latest measured event-loop lag", lambda: [({}, health.loop_lag)])
+metrics.collect("fdbot_gateway_connected", "gauge", "1 while connected to the Discord gateway", lambda: [({}, int(health.gateway_connected))])
+
+# --- HANDLER PROFILER ---
+# Opt-in (PROFILE_HANDLERS=1) profiling of every app command, context menu,
+# view/modal callback and bot event. Each handler coroutine is driven one step
+# at a time: a step is the synchronous run between two awaits, so the sum of
+# steps is the time spent in our own code and any single long step blocked the
+# loop. Discord REST calls (bot HTTP client and interaction webhooks) made
+# while a handler runs are timed separately, including those from tasks it
+# gathers, so API time can exceed the handler's wall time.
+PROFILE_HANDLERS = os.getenv("PROFILE_HANDLERS") == "1"
+PROFILE_BLOCK_THRESHOLD = float(os.getenv("PROFILE_BLOCK_MS", "50")) / 1000
+PROFILE_TOP_N = 10
+
+current_call = contextvars.ContextVar("current_call", default=None)
+PROFILER_FRAMES = {"run", "profiled", "timed_request", "profiled_view_task", "profiled_modal_task"}
+
+class HandlerCall:
+    __slots__ = ('name', 'started', 'own', 'api')
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.own = 0.0
+        self.api = 0.0
+
+def _await_site(coro):
+    # Innermost frame of ours in the await chain, i.e. where the handler is
+    # suspended (wrapped view tasks start in discord.py's own frames)
+    site = None
+    while coro is not None and getattr(coro, 'cr_frame', None) is not None:
+        frame = coro.cr_frame
+        if frame.f_code.co_filename == __file__ and frame.f_code.co_name not in PROFILER_FRAMES:
+            site = f"{frame.f_code.co_name}:{frame.f_lineno}"
+        coro = coro.cr_await
+    return site
+
+class _Stepped:
+    # Awaitable that drives a coroutine and times each synchronous step
+    def __init__(self, coro, call, profiler):
+        self.coro = coro
+        self.call = call
+        self.profiler = profiler
+
+    def __await__(self):
+        coro = self.coro
+        value, error = None, None
+        while True:
+            resumed_at = _await_site(coro) or "start"
+            start = time.perf_counter()
+            try:
+                yielded = coro.throw(error) if error else coro.send(value)
+            except StopIteration as stop:
+                self.profiler.step(self.call, time.perf_counter() - start, resumed_at, "return")
+                return stop.value
+            except BaseException:
+                self.profiler.step(self.call, time.perf_counter() - start, resumed_at, "raise")
+                raise
+            self.profiler.step(self.call, time.perf_counter() - start, resumed_at, _await_site(coro) or "await")
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+class HandlerProfiler:
+    def __init__(self, enabled, block_threshold, top_n):
+        self.enabled = enabled
+        self.block_threshold = block_threshold
+        self.top_n = top_n
+        self.reset()
+
+    def reset(self):
+        self.handlers = {} # name -> {'count', 'wall', 'own', 'api', 'max', 'blocked'}
+        self.slowest = [] # min-heap of (wall, seq, name, own, api, finished_at)
+        self.blocks = deque(maxlen=self.top_n) # (name, seconds, lines, at)
+        self._seq = 0
+        self.since = time.time()
+
+    async def run(self, name, fn, *args, **kwargs):
+        call = HandlerCall(name)
+        token = current_call.set(call)
+        try:
+            return await _Stepped(fn(*args, **kwargs), call, self)
+        finally:
+            current_call.reset(token)
+            self.finish(call)
+
+    def wrap(self, name, fn):
+        @functools.wraps(fn)
+        async def profiled(*args, **kwargs):
+            return await self.run(name, fn, *args, **kwargs)
+        return profiled
+
+    def wrap_request(self, request):
+        @functools.wraps(request)
+        async def timed_request(*args, **kwargs):
+            call = current_call.get()
+            if call is None:
+                return await request(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return await request(*args, **kwargs)
+            finally:
+                call.api += time.perf_counter() - start
+        return timed_request
+
+    def step(self, call, seconds, resumed_at, suspended_at):
+        call.own += seconds
+        if seconds >= self.block_threshold:
+            stats = self.handlers.setdefault(call.name, self._empty())
+            stats['blocked'] += 1
+            lines = f"{resumed_at} → {suspended_at}"
+            self.blocks.append((call.name, seconds, lines, time.time()))
+            print(f"Slow callback: {call.name} blocked the loop for {seconds * 1000:.0f} ms ({lines})")
+
+    def finish(self, call):
+        wall = time.perf_counter() - call.started
+        stats = self.handlers.setdefault(call.name, self._empty())
+        stats['count'] += 1
+        stats['wall'] += wall
+        stats['own'] += call.own
+        stats['api'] += call.api
+        stats['max'] = max(stats['max'], wall)
+        self._seq += 1
+        entry = (wall, self._seq, call.name, call.own, call.api, time.time())
+        if len(self.slowest) < self.top_n:
+            heapq.heappush(self.slowest, entry)
+        elif wall > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    @staticmethod
+    def _empty():
+        return {'count': 0, 'wall': 0.0, 'own': 0.0, 'api': 0.0, 'max': 0.0, 'blocked': 0}
+
+    def install(self, bot, dynamic_items=()):
+        if not self.enabled:
+            return
+        # App commands keep their callback in _callback; the parameters were
+        # already parsed from the original signature, so swapping it is safe.
+        for command in bot.tree.walk_commands():
+            if isinstance(command, app_commands.Command):
+                command._callback = self.wrap(f"/{command.qualified_name}", command._callback)
+        for kind in (discord.AppCommandType.message, discord.AppCommandType.user):
+            for menu in bot.tree.get_commands(type=kind):
+                menu._callback = self.wrap(f"menu:{menu.name}", menu._callback)
+        # @bot.event handlers are plain attributes on the bot instance
+        for name, handler in list(vars(bot).items()):
+            if name.startswith("on_") and asyncio.iscoroutinefunction(handler):
+                setattr(bot, name, self.wrap(f"event:{name[3:]}", handler))
+
+        view_task = ui.View._scheduled_task
+        async def profiled_view_task(view, item, interaction):
+            callback = getattr(item.callback, 'callback', item.callback)
+            name = getattr(callback, '__qualname__', type(item).__name__)
+            return await self.run(f"view:{name}", view_task, view, item, interaction)
+        ui.View._scheduled_task = profiled_view_task
+
+        modal_task = ui.Modal._scheduled_task
+        async def profiled_modal_task(modal, *args):
+            return await self.run(f"modal:{type(modal).__name__}", modal_task, modal, *args)
+        ui.Modal._scheduled_task = profiled_modal_task
+
+        for item_cls in dynamic_items:
+            item_cls.callback = self.wrap(f"view:{item_cls.__name__}", item_cls.callback)
+
+        from discord.webhook.async_ import AsyncWebhookAdapter
+        bot.http.request = self.wrap_request(bot.http.request)
+        AsyncWebhookAdapter.request = self.wrap_request(AsyncWebhookAdapter.request)
+        print(f"Handler profiling on (blocking threshold {self.block_threshold * 1000:.0f} ms).")
+
+    def report(self, limit=12):
+        lines = []
+        ranked = sorted(self.handlers.items(), key=lambda kv: kv[1]['wall'], reverse=True)
+        for name, s in ranked[:limit]:
+            if not s['count']:
+                continue
+            n = s['count']
+            lines.append(f"{name}: n={n}, avg {s['wall'] / n * 1000:.0f} ms "
+                         f"(own {s['own'] / n * 1000:.1f}, api {s['api'] / n * 1000:.0f}), "
+                         f"max {s['max'] * 1000:.0f} ms, blocked {s['blocked']}x")
+        return "\n".join(lines)
+
+    def slow_report(self):
+        return "\n".join(
+            f"{wall * 1000:.0f} ms {name} (own {own * 1000:.1f}, api {api * 1000:.0f}) <t:{int(at)}:R>"
+            for wall, _, name, own, api, at in sorted(self.slowest, reverse=True))
+
+    def block_report(self):
+        return "\n".join(
+            f"{seconds * 1000:.0f} ms {name} ({lines}) <t:{int(at)}:R>"
+            for name, seconds, lines, at in reversed(self.blocks))
+
+profiler = HandlerProfiler(PROFILE_HANDLERS, PROFILE_BLOCK_THRESHOLD, PROFILE_TOP_N)
 
 # --- CONFIGURATION ---
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -55,12 +441,241 @@ TIME_BLOCK_CHOICES = [
 ]
 
 # --- PERSISTENCE ---
-QUEUE_FILE = "queue.json"
+QUEUE_DIR = "queues" # Per-guild queue snapshots and journals
+QUEUE_FILE = "queue.json" # Single shared queue from older versions, migrated on load
+QUEUE_JOURNAL_FILE = "queue.journal"
 CONFIG_FILE = "config.json"
+SETTINGS_FILE = "settings.json"
+JOURNAL_COMPACT_EVERY = 500 # Journal records before folding them into a new snapshot
+# Format version written into queue snapshots (and the SQLite user_version).
+# 0: plain list of entries, 1: {'seq', 'queue'}, 2: adds 'version'. Files from
+# a newer version are refused rather than read and overwritten.
+SNAPSHOT_VERSION = 2
+FLUSH_INTERVAL = 1.0 # Seconds the background writer waits to coalesce a burst of changes
+ASSIGNMENTS_FILE = "assignments.jsonl"
+SQLITE_FILE = "workflow.db"
+# Records tracked until an assignment is settled: TAT deadlines and pending
+# receipt confirmations, one JSON document (or SQLite table) per kind
+TRACKED_FILES = {"deadlines": "deadlines.json", "receipts": "receipts.json"}
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json") # "json" or "sqlite"
+
+# --- WORK QUEUE ---
+# FIFO waiting list with a user_id index. Entries keep their arrival order in an
+# OrderedDict keyed by user_id, so membership checks, lookups, removal from any
+# position and head-pops are all O(1) no matter how long the queue gets.
+# version goes up on every change, so rendered views of the queue can tell
+# whether they are stale.
+class WorkQueue:
+    def __init__(self, entries=None):
+        self._entries = OrderedDict()
+        self.version = 0
+        for entry in entries or []:
+            self.append(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries.values())
+
+    def __contains__(self, user_id):
+        return user_id in self._entries
+
+    def get(self, user_id, default=None):
+        return self._entries.get(user_id, default)
+
+    def head(self):
+        return next(iter(self._entries.values()), None)
+
+    def append(self, entry):
+        # Returns False (and keeps the original position) for duplicate user_ids
+        if entry['user_id'] in self._entries:
+            return False
+        self._entries[entry['user_id']] = entry
+        self.version += 1
+        return True
+
+    def appendleft(self, entry):
+        # Puts an entry back at the front, e.g. an editor whose assignment
+        # couldn't be sent; False for duplicate user_ids like append()
+        if entry['user_id'] in self._entries:
+            return False
+        self._entries[entry['user_id']] = entry
+        self._entries.move_to_end(entry['user_id'], last=False)
+        self.version += 1
+        return True
 
-work_queue = []
-server_configs = {}
-available_cooldowns = {}
+    def replace(self, entry):
+        # Swaps in a new version of an existing entry, keeping its position
+        if entry['user_id'] not in self._entries:
+            return False
+        self._entries[entry['user_id']] = entry
+        self.version += 1
+        return True
+
+    def remove(self, user_id):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self.version += 1
+        return entry
+
+    def popleft(self):
+        if not self._entries:
+            return None
+        self.version += 1
+        return self._entries.popitem(last=False)[1]
+
+    def clear(self):
+        self._entries.clear()
+        self.version += 1
+
+    def slice(self, start, stop=None):
+        return list(islice(self._entries.values(), start, stop))
+
+    def to_list(self):
+        return list(self._entries.values())
+
+# --- BACKGROUND PERSISTENCE WRITER ---
+# Handlers only queue disk work here and return immediately. A background task
+# waits FLUSH_INTERVAL after the first change, then writes everything collected
+# in that window in one go from the default executor: whole documents are
+# replaced atomically (temp file + rename) and coalesced so only the latest
+# version is written, journal records are appended in a single write, and
+# storage backends get their queued row operations applied in one transaction.
+class PersistenceWriter:
+    def __init__(self, interval=FLUSH_INTERVAL):
+        self.interval = interval
+        self._documents = {} # path -> (snapshot callable, journal path it compacts)
+        self._records = {} # path -> [record, ...]
+        self._ops = {} # sink -> [op, ...], applied via sink.apply_ops()
+        self._dirty = None
+        self._flush_lock = None
+        self._task = None
+        self.flushes = 0
+        self.changes_coalesced = 0
+
+    @property
+    def backlog(self):
+        return (len(self._documents)
+                + sum(len(r) for r in self._records.values())
+                + sum(len(o) for o in self._ops.values()))
+
+    def append_record(self, path, record):
+        self._records.setdefault(path, []).append(record)
+        self._mark_dirty()
+
+    def append_op(self, sink, op):
+        self._ops.setdefault(sink, []).append(op)
+        self._mark_dirty()
+
+    def write_document(self, path, snapshot, compacts=None):
+        # snapshot() is called at flush time on the event loop and must return a
+        # copy that the executor thread can serialize safely
+        if path in self._documents:
+            self.changes_coalesced += 1
+        self._documents[path] = (snapshot, compacts)
+        self._mark_dirty()
+
+    def _mark_dirty(self):
+        if self._dirty is not None:
+            self._dirty.set()
+
+    def start(self):
+        if self._task is None:
+            self._dirty = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            if self.backlog:
+                self._dirty.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                metrics.inc("fdbot_persistence_failures_total")
+                print(f"Background save failed: {e}")
+
+    def _take_batch(self):
+        documents = [(path, snapshot(), compacts) for path, (snapshot, compacts) in self._documents.items()]
+        records = self._records
+        ops = self._ops
+        self._documents = {}
+        self._records = {}
+        self._ops = {}
+        return documents, records, ops
+
+    async def flush(self):
+        if self._flush_lock is None:
+            return self.flush_sync()
+        async with self._flush_lock:
+            self._dirty.clear()
+            if not self.backlog:
+                return
+            batch = self._take_batch()
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            await loop.run_in_executor(None, write_batch, *batch)
+            metrics.observe("fdbot_persistence_flush_seconds", time.perf_counter() - started)
+            self.flushes += 1
+
+    def flush_sync(self):
+        # For shutdown paths where the event loop is already gone
+        if self.backlog:
+            write_batch(*self._take_batch())
+            self.flushes += 1
+
+    async def close(self):
+        if self._task is not None:
+            # Cancel only between flushes: cancelling doesn't stop a write_batch
+            # already running in the executor, and the final flush below must
+            # not start a second one alongside it
+            async with self._flush_lock:
+                self._task.cancel()
+                self._task = None
+        await self.flush()
+
+def write_json_atomic(path, data):
+    # Write to a temp file and rename over the target, so readers only ever see
+    # the old or the new document, never a half-written one.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_batch(documents, records, ops):
+    # Runs in the executor. Snapshots go first: a snapshot already contains every
+    # journal record queued before it was taken, so the journal it compacts is
+    # truncated and those queued records are dropped.
+    for path, data, compacts in documents:
+        try:
+            write_json_atomic(path, data)
+        except Exception as e:
+            print(f"Failed to save {path}: {e}")
+            continue
+        if compacts:
+            with open(compacts, "w"):
+                pass
+            records.pop(compacts, None)
+    for path, batch in records.items():
+        try:
+            with open(path, "a") as f:
+                f.write("".join(json.dumps(r, separators=(',', ':')) + "\n" for r in batch))
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            print(f"Failed to append to {path}: {e}")
+    for sink, batch in ops.items():
+        try:
+            sink.apply_ops(batch)
+        except Exception as e:
+            print(f"Failed to apply {len(batch)} storage op(s): {e}")
+
+persistence = PersistenceWriter()
 
 # Sample data for preloading
 SAMPLE_DATA = [
@@ -80,50 +695,1119 @@ SAMPLE_DATA = [
     }
 ]
 
-def load_data():
-    global work_queue, server_configs
-    
-    # Load/Create Queue
-    if os.path.exists(QUEUE_FILE):
+# --- STORAGE ---
+# Holds the bot's live state (per-guild queues, guild log-channel configs and
+# settings, tracked records) and is the only place that changes it. Handlers read the in-memory
+# structures directly; every persisted mutation goes through a method here,
+# which updates memory and hands the change to the backend. Backends turn each
+# change into a small write queued on the background writer and never block
+# the event loop.
+#
+# Queues are sharded by guild: each guild has its own WorkQueue, persisted and
+# reset independently and loaded on first use. Handlers don't call the queue
+# mutators directly but submit them to queue_executor (see below).
+LEGACY_GUILD_ID = 0 # Bucket for entries saved before queues were per guild
+
+class Storage(ABC):
+    def __init__(self):
+        self.queues = {} # guild_id -> WorkQueue
+        self.configs = {} # str(guild_id) -> {log_type: channel_id} (or a legacy single channel id)
+        self.settings = {} # str(guild_id) -> {setting name: value}
+        self.tracked = {kind: {} for kind in TRACKED_FILES} # kind -> {assignment id -> record}
+        self.listener = None # told about queue events once attached (see QueueStats)
+
+    def load(self):
+        self.queues = {}
+        self.configs = {}
+        self.settings = {}
+        self.tracked = {kind: {} for kind in TRACKED_FILES}
+        if not self._load():
+            for entry in SAMPLE_DATA:
+                self.join(LEGACY_GUILD_ID, dict(entry))
+
+    # Queues
+    def queue_for(self, guild_id):
+        queue = self.queues.get(guild_id)
+        if queue is None:
+            queue = self.queues[guild_id] = self._load_queue(guild_id)
+        return queue
+
+    def join(self, guild_id, entry):
+        if not self.queue_for(guild_id).append(entry):
+            return False
+        self._queue_changed(guild_id, 'join', entry=entry)
+        self._notify(guild_id, 'join', entry)
+        return True
+
+    def leave(self, guild_id, user_id, op='leave'):
+        # op is 'leave' for opt-outs/removals and 'assign' when a file was handed out
+        entry = self.queue_for(guild_id).remove(user_id)
+        if entry:
+            self._queue_changed(guild_id, op, user_id=user_id)
+            self._notify(guild_id, op, entry)
+        return entry
+
+    def requeue(self, guild_id, entry):
+        if not self.queue_for(guild_id).appendleft(entry):
+            return False
+        self._queue_changed(guild_id, 'requeue', entry=entry)
+        self._notify(guild_id, 'requeue', entry)
+        return True
+
+    def update_entry(self, guild_id, user_id, fields):
+        # Entries are never modified in place (the background writer may be
+        # serializing them); a changed copy replaces the old one
+        queue = self.queue_for(guild_id)
+        entry = queue.get(user_id)
+        if entry is None:
+            return False
+        queue.replace({**entry, **fields})
+        self._queue_changed(guild_id, 'update', user_id=user_id, fields=fields)
+        return True
+
+    def reset(self, guild_id):
+        self.queue_for(guild_id).clear()
+        self._queue_changed(guild_id, 'reset')
+        self._notify(guild_id, 'reset', None)
+
+    def _notify(self, guild_id, op, entry):
+        if self.listener is not None:
+            self.listener.queue_changed(guild_id, op, entry, len(self.queues[guild_id]))
+
+    def adopt_legacy_queue(self, guild_id):
+        # Moves entries saved before per-guild queues into the given guild
+        moved = 0
+        for entry in self.queue_for(LEGACY_GUILD_ID).to_list():
+            self.leave(LEGACY_GUILD_ID, entry['user_id'])
+            moved += self.join(guild_id, entry)
+        return moved
+
+    # Guild configs
+    def set_guild_config(self, guild_id, config):
+        self.configs[str(guild_id)] = config
+        self._config_changed(str(guild_id))
+
+    # Guild settings
+    def guild_setting(self, guild_id, name, default=None):
+        return self.settings.get(str(guild_id), {}).get(name, default)
+
+    def set_guild_setting(self, guild_id, name, value):
+        self.settings.setdefault(str(guild_id), {})[name] = value
+        self._settings_changed(str(guild_id), name)
+
+    # Assignments
+    def record_assignment(self, assignment):
+        self._assignment_recorded(assignment)
+
+    # Tracked records (see TRACKED_FILES). Records are replaced, never modified in place.
+    @property
+    def deadlines(self):
+        return self.tracked['deadlines']
+
+    @property
+    def receipts(self):
+        return self.tracked['receipts']
+
+    def track(self, kind, record):
+        self.tracked[kind][record['id']] = record
+        self._tracked_changed(kind, record['id'])
+
+    def untrack(self, kind, record_id):
+        if self.tracked[kind].pop(record_id, None) is None:
+            return False
+        self._tracked_changed(kind, record_id)
+        return True
+
+    # Backend hooks; a backend missing one fails when it is created. _load()
+    # fills self.configs, migrates old layouts and returns False when there was
+    # no saved state at all (so sample data gets seeded).
+    @abstractmethod
+    def _load(self):
+        pass
+
+    @abstractmethod
+    def _load_queue(self, guild_id):
+        pass
+
+    @abstractmethod
+    def _queue_changed(self, guild_id, op, **fields):
+        pass
+
+    @abstractmethod
+    def _config_changed(self, guild_id):
+        pass
+
+    @abstractmethod
+    def _settings_changed(self, guild_id, name):
+        pass
+
+    @abstractmethod
+    def _assignment_recorded(self, assignment):
+        pass
+
+    @abstractmethod
+    def _tracked_changed(self, kind, record_id):
+        pass
+
+# --- JSON BACKEND ---
+# Each guild's queue lives in QUEUE_DIR as <guild_id>.json (snapshot) plus
+# <guild_id>.journal, an append-only log of queue mutations (join, requeue,
+# leave, assign, update, reset). Each change costs one short line instead of a rewrite of the
+# whole queue; save_queue() periodically folds the journal into a snapshot and
+# truncates it. Records carry a sequence number so replay skips anything already
+# in the snapshot, and a torn last line from a crash mid-write is dropped on
+# replay.
+def apply_queue_record(queue, record):
+    op = record.get('op')
+    if op == 'join':
+        queue.append(record['entry'])
+    elif op == 'requeue':
+        queue.appendleft(record['entry'])
+    elif op in ('leave', 'assign'):
+        queue.remove(record['user_id'])
+    elif op == 'update':
+        entry = queue.get(record['user_id'])
+        if entry:
+            queue.replace({**entry, **record['fields']})
+    elif op == 'reset':
+        queue.clear()
+
+class QueueJournal:
+    def __init__(self, path):
+        self.path = path
+        self.seq = 0 # Sequence number of the last record written or replayed
+        self.pending = 0 # Records written since the last snapshot
+
+    def record(self, op, **fields):
+        # Queued on the background writer; nothing touches the disk here
+        self.seq += 1
+        persistence.append_record(self.path, {'seq': self.seq, 'op': op, **fields})
+        self.pending += 1
+
+    def replay(self, queue, after_seq=0):
+        self.seq = after_seq
+        self.pending = 0
+        if not os.path.exists(self.path):
+            return 0
+        applied = 0
+        good_bytes = 0
+        torn = False
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("record missing its newline")
+                    record = json.loads(line)
+                except ValueError:
+                    torn = True
+                    break
+                good_bytes += len(line)
+                if record.get('seq', 0) <= after_seq:
+                    continue
+                apply_queue_record(queue, record)
+                self.seq = record['seq']
+                self.pending += 1
+                applied += 1
+        if torn:
+            # Torn write from a crash; cut it off so new records start on a clean line
+            print("Dropping truncated queue journal record.")
+            with open(self.path, "r+b") as f:
+                f.truncate(good_bytes)
+        return applied
+
+def load_queue_files(snapshot_path, journal):
+    # Latest snapshot + replay of the journal written since
+    queue = WorkQueue()
+    snapshot_seq = 0
+    version = SNAPSHOT_VERSION
+    if os.path.exists(snapshot_path):
         try:
-            with open(QUEUE_FILE, "r") as f:
+            with open(snapshot_path, "r") as f:
                 content = f.read()
-                if not content:
-                    work_queue = SAMPLE_DATA
-                    save_queue()
-                else:
-                    work_queue = json.loads(content)
+            snapshot = json.loads(content) if content else []
+            if isinstance(snapshot, list): # Legacy format: plain list of entries
+                snapshot = {'version': 0, 'queue': snapshot}
+            version = snapshot.get('version', 1)
+            if version <= SNAPSHOT_VERSION:
+                queue = WorkQueue(snapshot.get('queue', []))
+                snapshot_seq = snapshot.get('seq', 0)
         except Exception as e:
-            print(f"Error loading queue: {e}")
-            work_queue = []
-    else:
-        work_queue = SAMPLE_DATA
-        save_queue()
-    
-    # Load/Create Config
-    if os.path.exists(CONFIG_FILE):
+            # Keep the unreadable file around instead of silently overwriting it
+            corrupt_path = f"{snapshot_path}.corrupt-{int(datetime.now().timestamp())}"
+            print(f"Error loading queue snapshot: {e} (moved to {corrupt_path})")
+            os.replace(snapshot_path, corrupt_path)
+        if version > SNAPSHOT_VERSION:
+            raise RuntimeError(f"{snapshot_path} was written by a newer version of the bot (format {version}); refusing to load it.")
+
+    replayed = journal.replay(queue, after_seq=snapshot_seq)
+    if replayed:
+        print(f"Replayed {replayed} queue journal record(s) from {journal.path}.")
+    return queue
+
+class JsonStorage(Storage):
+    def __init__(self):
+        super().__init__()
+        self.journals = {} # guild_id -> QueueJournal
+
+    def _paths(self, guild_id):
+        return os.path.join(QUEUE_DIR, f"{guild_id}.json"), os.path.join(QUEUE_DIR, f"{guild_id}.journal")
+
+    def _journal(self, guild_id):
+        journal = self.journals.get(guild_id)
+        if journal is None:
+            journal = self.journals[guild_id] = QueueJournal(self._paths(guild_id)[1])
+        return journal
+
+    def _load(self):
+        found = os.path.isdir(QUEUE_DIR) and bool(os.listdir(QUEUE_DIR))
+        os.makedirs(QUEUE_DIR, exist_ok=True)
+        found = self._migrate_single_queue() or found
+
+        if os.path.exists(CONFIG_FILE):
+            found = True
+            try:
+                with open(CONFIG_FILE, "r") as f:
+                    self.configs = json.load(f)
+            except Exception as e:
+                print(f"Error loading config: {e}")
+
+        if os.path.exists(SETTINGS_FILE):
+            try:
+                with open(SETTINGS_FILE, "r") as f:
+                    self.settings = json.load(f)
+            except Exception as e:
+                print(f"Error loading settings: {e}")
+
+        for kind, path in TRACKED_FILES.items():
+            if os.path.exists(path):
+                try:
+                    with open(path, "r") as f:
+                        self.tracked[kind] = {record['id']: record for record in json.load(f)}
+                except Exception as e:
+                    print(f"Error loading {kind}: {e}")
+        return found
+
+    def _migrate_single_queue(self):
+        # queue.json/queue.journal from before per-guild queues become the legacy bucket
+        if not (os.path.exists(QUEUE_FILE) or os.path.exists(QUEUE_JOURNAL_FILE)):
+            return False
+        queue = load_queue_files(QUEUE_FILE, QueueJournal(QUEUE_JOURNAL_FILE))
+        write_json_atomic(self._paths(LEGACY_GUILD_ID)[0], {'version': SNAPSHOT_VERSION, 'seq': 0, 'queue': queue.to_list()})
+        for path in (QUEUE_FILE, QUEUE_JOURNAL_FILE):
+            if os.path.exists(path):
+                os.replace(path, f"{path}.migrated")
+        print(f"Migrated {len(queue)} entries from {QUEUE_FILE} to per-guild storage.")
+        return True
+
+    def guild_ids_on_disk(self):
+        ids = set()
+        for name in os.listdir(QUEUE_DIR):
+            stem, ext = os.path.splitext(name)
+            if ext in (".json", ".journal") and stem.isdigit():
+                ids.add(int(stem))
+        return ids
+
+    def _load_queue(self, guild_id):
+        return load_queue_files(self._paths(guild_id)[0], self._journal(guild_id))
+
+    def save_queue(self, guild_id):
+        # Full snapshot of one guild's queue; also compacts its journal
+        journal = self._journal(guild_id)
+        queue = self.queue_for(guild_id)
+        snapshot_path, journal_path = self._paths(guild_id)
+        persistence.write_document(snapshot_path, lambda: {'version': SNAPSHOT_VERSION, 'seq': journal.seq, 'queue': queue.to_list()}, compacts=journal_path)
+        journal.pending = 0
+
+    def _queue_changed(self, guild_id, op, **fields):
+        journal = self._journal(guild_id)
+        journal.record(op, **fields)
+        if op == 'reset' or journal.pending >= JOURNAL_COMPACT_EVERY:
+            self.save_queue(guild_id)
+
+    def _config_changed(self, guild_id):
+        persistence.write_document(CONFIG_FILE, lambda: dict(self.configs))
+
+    def _settings_changed(self, guild_id, name):
+        persistence.write_document(SETTINGS_FILE, lambda: {g: dict(v) for g, v in self.settings.items()})
+
+    def _assignment_recorded(self, assignment):
+        persistence.append_record(ASSIGNMENTS_FILE, assignment)
+
+    def _tracked_changed(self, kind, record_id):
+        records = self.tracked[kind]
+        persistence.write_document(TRACKED_FILES[kind], lambda: list(records.values()))
+
+# --- SQLITE BACKEND ---
+# One row per queue entry, assignment and (guild, log type) route in a WAL-mode
+# database, so every mutation is a single-row INSERT/DELETE and start-up only
+# reads config rows; a guild's queue rows are read (by index) the first time
+# that guild is used. Row operations are queued on the background writer and
+# applied in one transaction per flush.
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    name TEXT,
+    time INTEGER,
+    time_block TEXT,
+    jump_url TEXT,
+    UNIQUE (guild_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_queue_guild ON queue_entries (guild_id, seq);
+CREATE TABLE IF NOT EXISTS assignments (
+    id TEXT PRIMARY KEY,
+    guild_id INTEGER,
+    channel_id INTEGER,
+    user_id INTEGER NOT NULL,
+    file_type TEXT,
+    file_name TEXT,
+    audio_length TEXT,
+    assigned_by INTEGER,
+    assigned_at INTEGER,
+    in_queue INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_assignments_user ON assignments (user_id, assigned_at);
+CREATE INDEX IF NOT EXISTS idx_assignments_guild ON assignments (guild_id, assigned_at);
+CREATE TABLE IF NOT EXISTS deadlines (
+    id TEXT PRIMARY KEY,
+    guild_id INTEGER,
+    channel_id INTEGER,
+    user_id INTEGER NOT NULL,
+    file_type TEXT,
+    file_name TEXT,
+    assigned_at INTEGER,
+    fr_due INTEGER,
+    sv_due INTEGER,
+    at_risk_at INTEGER,
+    due_at INTEGER,
+    state TEXT
+);
+CREATE TABLE IF NOT EXISTS receipts (
+    id TEXT PRIMARY KEY,
+    guild_id INTEGER,
+    channel_id INTEGER,
+    message_id INTEGER,
+    user_id INTEGER NOT NULL,
+    content TEXT,
+    expires_at INTEGER
+);
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (guild_id, name)
+);
+CREATE TABLE IF NOT EXISTS guild_configs (
+    guild_id TEXT NOT NULL,
+    log_type TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, log_type)
+);
+"""
+QUEUE_COLUMNS = ('user_id', 'name', 'time', 'time_block', 'jump_url')
+ASSIGNMENT_COLUMNS = ('id', 'guild_id', 'channel_id', 'user_id', 'file_type', 'file_name', 'audio_length', 'assigned_by', 'assigned_at', 'in_queue')
+TRACKED_COLUMNS = {
+    'deadlines': ('id', 'guild_id', 'channel_id', 'user_id', 'file_type', 'file_name', 'assigned_at', 'fr_due', 'sv_due', 'at_risk_at', 'due_at', 'state'),
+    'receipts': ('id', 'guild_id', 'channel_id', 'message_id', 'user_id', 'content', 'expires_at'),
+}
+LEGACY_LOG_TYPE = "*" # guild_configs row for a legacy single-channel config
+
+class SQLiteStorage(Storage):
+    def __init__(self, path=SQLITE_FILE):
+        super().__init__()
+        self.path = path
+        self.conn = None
+        self.reader = None
+
+    def _connect(self):
+        is_new = not os.path.exists(self.path)
+        # self.conn does the schema setup here and then belongs to the executor
+        # (apply_ops). Reads on the loop thread, such as a guild's queue loaded
+        # on first use while a flush may be running, go through self.reader, a
+        # separate read-only connection; with WAL it never waits on the writer.
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > SNAPSHOT_VERSION:
+            raise RuntimeError(f"{self.path} was written by a newer version of the bot (format {version}); refusing to load it.")
+        self._migrate_queue_table()
+        self.conn.executescript(SQLITE_SCHEMA)
+        self.conn.execute(f"PRAGMA user_version = {SNAPSHOT_VERSION}")
+        self.reader = sqlite3.connect(f"file:{pathname2url(os.path.abspath(self.path))}?mode=ro", uri=True)
+        return is_new
+
+    def _migrate_queue_table(self):
+        # Databases from before per-guild queues have no guild_id column
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(queue_entries)")]
+        if not columns or 'guild_id' in columns:
+            return
+        with self.conn:
+            self.conn.execute("ALTER TABLE queue_entries RENAME TO queue_entries_v1")
+            self.conn.executescript(SQLITE_SCHEMA)
+            self.conn.execute(
+                f"INSERT INTO queue_entries (seq, guild_id, {', '.join(QUEUE_COLUMNS)}) "
+                f"SELECT seq, ?, {', '.join(QUEUE_COLUMNS)} FROM queue_entries_v1", (LEGACY_GUILD_ID,)
+            )
+            self.conn.execute("DROP TABLE queue_entries_v1")
+
+    def _load(self):
+        if self.conn is None and self._connect():
+            return self._import_json()
+
+        for guild_id, log_type, channel_id in self.reader.execute("SELECT guild_id, log_type, channel_id FROM guild_configs"):
+            if log_type == LEGACY_LOG_TYPE:
+                self.configs[guild_id] = channel_id
+            else:
+                self.configs.setdefault(guild_id, {})[log_type] = channel_id
+        for guild_id, name, value in self.reader.execute("SELECT guild_id, name, value FROM guild_settings"):
+            self.settings.setdefault(guild_id, {})[name] = json.loads(value)
+        for kind, columns in TRACKED_COLUMNS.items():
+            for row in self.reader.execute(f"SELECT {', '.join(columns)} FROM {kind}"):
+                record = dict(zip(columns, row))
+                self.tracked[kind][record['id']] = record
+        return True
+
+    def _load_queue(self, guild_id):
+        rows = self.reader.execute(
+            f"SELECT {', '.join(QUEUE_COLUMNS)} FROM queue_entries WHERE guild_id = ? ORDER BY seq", (guild_id,)
+        )
+        return WorkQueue({k: v for k, v in zip(QUEUE_COLUMNS, row) if v is not None} for row in rows)
+
+    def _import_json(self):
+        # First start on SQLite: carry over any state left by the JSON backend
+        if not (os.path.isdir(QUEUE_DIR) or os.path.exists(QUEUE_FILE) or os.path.exists(CONFIG_FILE) or os.path.exists(SETTINGS_FILE)):
+            return False
+        legacy = JsonStorage()
+        legacy._load()
+        for guild_id in legacy.guild_ids_on_disk():
+            for entry in legacy.queue_for(guild_id):
+                self.join(guild_id, entry)
+        for guild_id, config in legacy.configs.items():
+            self.set_guild_config(guild_id, config)
+        for guild_id, settings in legacy.settings.items():
+            for name, value in settings.items():
+                self.set_guild_setting(guild_id, name, value)
+        for kind, records in legacy.tracked.items():
+            for record in records.values():
+                self.track(kind, record)
+        print(f"Imported {sum(len(q) for q in self.queues.values())} queue entries and {len(self.configs)} guild configs from JSON.")
+        return True
+
+    def apply_ops(self, ops):
+        # Runs in the executor
+        with self.conn:
+            for sql, params in ops:
+                self.conn.execute(sql, params)
+
+    def _queue_changed(self, guild_id, op, **fields):
+        if op == 'join':
+            entry = fields['entry']
+            persistence.append_op(self, (
+                f"INSERT OR IGNORE INTO queue_entries (guild_id, {', '.join(QUEUE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                (guild_id,) + tuple(entry.get(k) for k in QUEUE_COLUMNS)
+            ))
+        elif op == 'requeue':
+            # Below the lowest seq in the table, so it sorts first in its guild
+            entry = fields['entry']
+            persistence.append_op(self, (
+                f"INSERT OR IGNORE INTO queue_entries (seq, guild_id, {', '.join(QUEUE_COLUMNS)}) "
+                f"VALUES ((SELECT COALESCE(MIN(seq), 1) - 1 FROM queue_entries), ?, ?, ?, ?, ?, ?)",
+                (guild_id,) + tuple(entry.get(k) for k in QUEUE_COLUMNS)
+            ))
+        elif op in ('leave', 'assign'):
+            persistence.append_op(self, ("DELETE FROM queue_entries WHERE guild_id = ? AND user_id = ?", (guild_id, fields['user_id'])))
+        elif op == 'update':
+            columns = [k for k in fields['fields'] if k in QUEUE_COLUMNS]
+            if columns:
+                persistence.append_op(self, (
+                    f"UPDATE queue_entries SET {', '.join(f'{k} = ?' for k in columns)} WHERE guild_id = ? AND user_id = ?",
+                    tuple(fields['fields'][k] for k in columns) + (guild_id, fields['user_id'])
+                ))
+        elif op == 'reset':
+            persistence.append_op(self, ("DELETE FROM queue_entries WHERE guild_id = ?", (guild_id,)))
+
+    def _config_changed(self, guild_id):
+        config = self.configs[guild_id]
+        persistence.append_op(self, ("DELETE FROM guild_configs WHERE guild_id = ?", (guild_id,)))
+        routes = {LEGACY_LOG_TYPE: config} if isinstance(config, int) else config
+        for log_type, channel_id in routes.items():
+            persistence.append_op(self, (
+                "INSERT INTO guild_configs (guild_id, log_type, channel_id) VALUES (?, ?, ?)",
+                (guild_id, log_type, channel_id)
+            ))
+
+    def _settings_changed(self, guild_id, name):
+        # Values are stored JSON-encoded so ints, strings and lists round-trip
+        persistence.append_op(self, (
+            "INSERT OR REPLACE INTO guild_settings (guild_id, name, value) VALUES (?, ?, ?)",
+            (guild_id, name, json.dumps(self.settings[guild_id][name]))
+        ))
+
+    def _assignment_recorded(self, assignment):
+        persistence.append_op(self, (
+            f"INSERT OR REPLACE INTO assignments ({', '.join(ASSIGNMENT_COLUMNS)}) VALUES ({', '.join('?' * len(ASSIGNMENT_COLUMNS))})",
+            tuple(assignment.get(k) for k in ASSIGNMENT_COLUMNS)
+        ))
+
+    def _tracked_changed(self, kind, record_id):
+        # kind is one of TRACKED_COLUMNS, never user input
+        record = self.tracked[kind].get(record_id)
+        columns = TRACKED_COLUMNS[kind]
+        if record is None:
+            persistence.append_op(self, (f"DELETE FROM {kind} WHERE id = ?", (record_id,)))
+        else:
+            persistence.append_op(self, (
+                f"INSERT OR REPLACE INTO {kind} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                tuple(record.get(k) for k in columns)
+            ))
+
+def create_storage(backend=STORAGE_BACKEND):
+    if backend == "sqlite":
+        return SQLiteStorage()
+    return JsonStorage()
+
+storage = create_storage()
+
+# Cold-start instrumentation: seconds spent loading state, and from process
+# start until the first on_ready
+PROCESS_STARTED = time.perf_counter()
+startup_timings = {}
+
+def load_data():
+    started = time.perf_counter()
+    storage.load()
+    startup_timings['load'] = time.perf_counter() - started
+    print(f"Loaded {type(storage).__name__} state in {startup_timings['load'] * 1000:.1f} ms "
+          f"({len(storage.configs)} guild config(s), {sum(len(r) for r in storage.tracked.values())} tracked record(s)).")
+
+# --- AUDIT LOG ---
+# Local, append-only history of every queue and assignment mutation, one JSON
+# event per line in AUDIT_DIR/events-<UTC date>.jsonl. Events are appended by
+# the background writer; when the UTC date changes, earlier days are
+# compressed to .jsonl.gz. Queue events are recorded inside the guild's queue
+# executor together with the mutation, so their order is the order applied.
+# replay_audit() rebuilds queue state from the events (see
+# tools/replay_audit.py).
+AUDIT_DIR = "audit"
+
+def audit_day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+def compress_audit_files(directory, today):
+    # Runs in the executor. A crash between writing the .gz and removing the
+    # plain file leaves both; the .gz is complete then, so the plain one goes.
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("events-") and name.endswith(".jsonl")) or name[7:17] >= today:
+            continue
+        path = os.path.join(directory, name)
+        if not os.path.exists(path + ".gz"):
+            with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(path + ".gz.tmp", path + ".gz")
+        os.remove(path)
+
+class AuditLog:
+    def __init__(self, directory=AUDIT_DIR):
+        self.directory = directory
+        self.day = None
+        self._day_ends = 0
+        self._rotation = None
+        self.events = 0
+
+    def start(self):
+        # Compresses days left over from before a restart
+        os.makedirs(self.directory, exist_ok=True)
+        self._rotate()
+
+    def record(self, guild_id, event, **fields):
+        now = time.time()
+        if now >= self._day_ends:
+            os.makedirs(self.directory, exist_ok=True)
+            rolled_over = self.day is not None
+            self.day = audit_day(now)
+            tomorrow = datetime.strptime(self.day, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+            self._day_ends = tomorrow.timestamp()
+            if rolled_over:
+                self._rotate()
+        persistence.append_record(os.path.join(self.directory, f"events-{self.day}.jsonl"),
+                                  {'ts': round(now, 3), 'guild_id': guild_id, 'event': event, **fields})
+        self.events += 1
+
+    def baseline(self, guild_id):
+        # Queue mutation: records the full queue so replays can start here
+        self.record(guild_id, 'baseline', queue=storage.queue_for(guild_id).to_list())
+
+    def _rotate(self):
+        try:
+            self._rotation = asyncio.get_running_loop().create_task(self._compress())
+        except RuntimeError:
+            pass # no loop (scripts); files are compressed on the next start
+
+    async def _compress(self):
+        # Flush first so no appends for an earlier day are still queued
+        await persistence.flush()
+        loop = asyncio.get_running_loop()
         try:
-            with open(CONFIG_FILE, "r") as f:
-                server_configs = json.load(f)
+            await loop.run_in_executor(None, compress_audit_files, self.directory, audit_day(time.time()))
         except Exception as e:
-            server_configs = {}
-    else:
-        server_configs = {}
-        save_config()
+            print(f"Audit log rotation failed: {e}")
+
+def read_audit_events(directory=AUDIT_DIR, until=None):
+    # Yields events in order, up to the timestamp `until` if given. Lines that
+    # don't parse (a write cut short by a crash) are skipped.
+    days = {}
+    for name in os.listdir(directory):
+        if name.startswith("events-") and name.endswith((".jsonl", ".jsonl.gz")):
+            day = name[7:17]
+            if name.endswith(".gz") or day not in days:
+                days[day] = os.path.join(directory, name)
+    last_day = audit_day(until) if until is not None else None
+    for day in sorted(days):
+        if last_day and day > last_day:
+            return
+        path = days[day]
+        with (gzip.open(path, "rt") if path.endswith(".gz") else open(path, "r")) as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if until is not None and event['ts'] > until:
+                    return
+                yield event
+
+def replay_audit(events):
+    # Rebuilds {guild_id: WorkQueue} and the list of assignments from events
+    queues = {}
+    assignments = []
+    for event in events:
+        guild_id = event['guild_id']
+        kind = event['event']
+        queue = queues.setdefault(guild_id, WorkQueue())
+        if kind == 'baseline':
+            queues[guild_id] = WorkQueue(event['queue'])
+        elif kind == 'join':
+            queue.append(event['entry'])
+        elif kind == 'requeue':
+            queue.appendleft(event['entry'])
+        elif kind == 'update':
+            entry = queue.get(event['user_id'])
+            if entry:
+                queue.replace({**entry, **event['fields']})
+        elif kind in ('optout', 'remove', 'rollback', 'dequeue'):
+            queue.remove(event['user_id'])
+        elif kind == 'reset':
+            queue.clear()
+        elif kind == 'assign':
+            assignments.append(event['assignment'])
+    return queues, assignments
+
+audit_log = AuditLog()
+
+# --- QUEUE EXECUTOR ---
+# Single writer per guild: every queue mutation is submitted here and applied by
+# that guild's worker task in submission order. Mutations are plain synchronous
+# functions, so a duplicate check and the change it guards run as one step and
+# no other handler can interleave between them. Handlers do their Discord I/O
+# before or after awaiting the result, never inside the critical section.
+class GuildExecutor:
+    def __init__(self):
+        self._inboxes = {} # guild_id -> asyncio.Queue of (mutation, args, future)
+        self._workers = {} # guild_id -> worker task
+        self.submitted = 0
+        self.applied = 0
+
+    @property
+    def backlog(self):
+        return sum(inbox.qsize() for inbox in self._inboxes.values())
+
+    def submit(self, guild_id, mutation, *args):
+        inbox = self._inboxes.get(guild_id)
+        if inbox is None:
+            inbox = self._inboxes[guild_id] = asyncio.Queue()
+            self._workers[guild_id] = asyncio.create_task(self._work(inbox))
+        future = asyncio.get_running_loop().create_future()
+        inbox.put_nowait((mutation, args, future))
+        self.submitted += 1
+        return future
+
+    async def _work(self, inbox):
+        while True:
+            mutation, args, future = await inbox.get()
+            try:
+                result = mutation(*args)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            self.applied += 1
+
+queue_executor = GuildExecutor()
+
+def join_queue(guild_id, entry):
+    # Duplicate check + insert as one mutation. Returns (existing entry, None)
+    # if the editor is already queued, else (None, their new position).
+    queue = storage.queue_for(guild_id)
+    existing = queue.get(entry['user_id'])
+    if existing:
+        return existing, None
+    storage.join(guild_id, entry)
+    audit_log.record(guild_id, 'join', entry=entry)
+    dispatcher.wake()
+    return None, len(queue)
+
+def leave_queue(guild_id, user_id, reason):
+    # Removal + audit event as one mutation. reason is the audit event:
+    # 'optout', 'remove', 'rollback' (join announcement failed) or 'dequeue'
+    # (handed a file).
+    entry = storage.leave(guild_id, user_id, 'assign' if reason == 'dequeue' else 'leave')
+    if entry:
+        audit_log.record(guild_id, reason, user_id=user_id)
+    return entry
+
+def requeue_editor(guild_id, entry):
+    # Puts a dequeued editor back at the head of the queue (their assignment
+    # couldn't be sent). Doesn't wake the dispatcher: it would retry at once.
+    if storage.requeue(guild_id, entry):
+        audit_log.record(guild_id, 'requeue', entry=entry)
+
+def requeue_editors(guild_id, entries):
+    # Several at once (a batch), keeping their original order at the head
+    for entry in reversed(entries):
+        requeue_editor(guild_id, entry)
+
+def update_queue_entry(guild_id, user_id, fields):
+    if storage.update_entry(guild_id, user_id, fields):
+        audit_log.record(guild_id, 'update', user_id=user_id, fields=fields)
+
+def reset_guild_queue(guild_id):
+    storage.reset(guild_id)
+    audit_log.record(guild_id, 'reset')
+
+# --- OUTBOUND DISPATCHER ---
+# Every Discord send that fans out from a handler goes through here. Sends are
+# limited per route: the channel a message is posted to, or the user whose DM
+# channel it goes to. At most OUTBOUND_CONCURRENCY sends per route are in
+# flight at once; when a slot frees up it goes to the oldest waiting USER send
+# for that route before any LOG send, so an editor's assignment message or a
+# fallback in a channel that also takes logs isn't stuck behind a flood of log
+# embeds. Sends to different routes never wait on each other; discord.py's
+# own rate limiter handles the per-route and global limits.
+# Each send is timed under its stage name.
+LANE_USER = 0
+LANE_LOG = 1
+# Discord allows about 5 messages per 5 seconds in one channel. Past 5 in
+# flight, extra sends would only queue in discord.py's rate limiter, where
+# they can no longer be reordered by lane.
+OUTBOUND_CONCURRENCY = 5
+
+class OutboundDispatcher:
+    def __init__(self, concurrency=OUTBOUND_CONCURRENCY):
+        self.concurrency = concurrency # per route
+        self._routes = {} # route -> [sends in flight, heap of (lane, seq, future) waiting]
+        self._seq = 0
+        self.stages = {} # stage -> {'count', 'total', 'max', 'waited'} in seconds
+
+    @staticmethod
+    def route_of(send):
+        # channel.send / user.send: the channel or DM recipient's id
+        return getattr(getattr(send, '__self__', None), 'id', None)
+
+    async def send(self, lane, stage, send, *args, **kwargs):
+        route = self.route_of(send)
+        start = time.perf_counter()
+        await self._acquire(route, lane)
+        acquired = time.perf_counter()
+        try:
+            return await send(*args, **kwargs)
+        except Exception:
+            metrics.inc("fdbot_discord_send_failures_total", stage=stage)
+            raise
+        finally:
+            self._release(route)
+            self.record(stage, time.perf_counter() - start, acquired - start)
+            metrics.observe("fdbot_discord_send_seconds", time.perf_counter() - start, stage=stage)
+
+    async def _acquire(self, route, lane):
+        state = self._routes.get(route)
+        if state is None:
+            state = self._routes[route] = [0, []]
+        if state[0] < self.concurrency and not state[1]:
+            state[0] += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._seq += 1
+        heapq.heappush(state[1], (lane, self._seq, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before we were cancelled
+            if future.done() and not future.cancelled():
+                self._release(route)
+            raise
+
+    def _release(self, route):
+        # Hand the slot straight to the next waiter so a new arrival can't jump it
+        state = self._routes[route]
+        while state[1]:
+            _, _, future = heapq.heappop(state[1])
+            if not future.done():
+                future.set_result(None)
+                return
+        state[0] -= 1
+        if state[0] == 0:
+            del self._routes[route] # one entry per DM recipient otherwise piles up
+
+    def record(self, stage, seconds, waited=0.0):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = {'count': 0, 'total': 0.0, 'max': 0.0, 'waited': 0.0}
+        stats['count'] += 1
+        stats['total'] += seconds
+        stats['waited'] += waited
+        if seconds > stats['max']:
+            stats['max'] = seconds
+
+    def report(self):
+        lines = []
+        for stage, stats in sorted(self.stages.items()):
+            avg = stats['total'] / stats['count'] * 1000
+            wait = stats['waited'] / stats['count'] * 1000
+            lines.append(f"{stage}: n={stats['count']}, avg {avg:.1f} ms (waited {wait:.1f} ms), max {stats['max'] * 1000:.1f} ms")
+        return "\n".join(lines)
+
+outbound = OutboundDispatcher()
+
+# --- AVAILABLE MESSAGE INDEX ---
+# Bounded LRU of recent "available" messages (message_id -> editor), filled by
+# the text trigger and /available, so an SWC emoji reaction can resolve who to
+# assign without a fetch_message round-trip. Only misses fall back to REST.
+AVAILABLE_INDEX_SIZE = 2048
+
+class AvailableIndex:
+    def __init__(self, maxsize=AVAILABLE_INDEX_SIZE):
+        self.maxsize = maxsize
+        self._authors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def remember(self, message_id, author):
+        self._authors[message_id] = author
+        self._authors.move_to_end(message_id)
+        if len(self._authors) > self.maxsize:
+            self._authors.popitem(last=False)
+
+    def lookup(self, message_id):
+        author = self._authors.get(message_id)
+        if author is None:
+            self.misses += 1
+            return None
+        self._authors.move_to_end(message_id)
+        self.hits += 1
+        return author
+
+    def report(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups * 100 if lookups else 0.0
+        return f"available index: {len(self._authors)}/{self.maxsize} cached, {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
+
+available_index = AvailableIndex()
+
+# --- JOIN COOLDOWNS ---
+# How long an editor has to wait between queue join requests, shared by
+# /available and the text "available" trigger. Set per guild with /setcooldown.
+# Entries are filed in COOLDOWN_BUCKET-second buckets by the time they end; each
+# call drops every bucket that has fully passed, so expiry is amortized O(1)
+# and memory only holds cooldowns that are still running.
+DEFAULT_JOIN_COOLDOWN = 600 # 10 Minutes
+COOLDOWN_BUCKET = 30
+
+class CooldownStore:
+    def __init__(self, bucket=COOLDOWN_BUCKET):
+        self.bucket = bucket
+        self._until = {} # (guild_id, user_id) -> when their cooldown ends
+        self._buckets = {} # bucket index -> keys whose cooldown ends in that bucket
+        self._bucket_order = [] # heap of bucket indices
+        self.rejected = {} # guild_id -> requests turned away
+
+    def __len__(self):
+        return len(self._until)
+
+    def _expire(self, now):
+        current = int(now // self.bucket)
+        while self._bucket_order and self._bucket_order[0] < current:
+            for key in self._buckets.pop(heapq.heappop(self._bucket_order)):
+                # Skip keys whose cooldown was restarted into a later bucket
+                if self._until.get(key, now) <= now:
+                    self._until.pop(key, None)
+
+    def acquire(self, guild_id, user_id, seconds, now=None):
+        # Starts the cooldown and returns None, or returns when the running one ends
+        now = now or time.time()
+        self._expire(now)
+        key = (guild_id, user_id)
+        until = self._until.get(key)
+        if until is not None and until > now:
+            self.rejected[guild_id] = self.rejected.get(guild_id, 0) + 1
+            return until
+        if seconds > 0:
+            until = now + seconds
+            self._until[key] = until
+            index = int(until // self.bucket)
+            if index not in self._buckets:
+                self._buckets[index] = set()
+                heapq.heappush(self._bucket_order, index)
+            self._buckets[index].add(key)
+        return None
 
-def save_queue():
-    try:
-        with open(QUEUE_FILE, "w") as f:
-            json.dump(work_queue, f, indent=4)
-    except Exception as e:
-        print(f"Failed to save queue: {e}")
+    def report(self):
+        rejected = sum(self.rejected.values())
+        return f"join cooldowns: {len(self)} active, {rejected} request(s) rejected"
+
+cooldowns = CooldownStore()
+
+def join_cooldown(guild_id):
+    return storage.guild_setting(guild_id, 'join_cooldown', DEFAULT_JOIN_COOLDOWN)
+
+# --- QUEUE ANALYTICS ---
+# Running queue statistics per guild, updated on every queue event and never
+# rebuilt from history: wait times (join to assignment) per time block as
+# quantile sketches, assignment counts per editor and file type, and the
+# time-weighted queue depth per hour of day (EST). Storage reports queue
+# events once attached; snapshots are kept in the guild's settings, written at
+# most every QUEUE_STATS_SAVE_INTERVAL seconds and on shutdown.
+QUANTILE_ACCURACY = 0.02 # relative error of any reported quantile
+SKETCH_GAMMA = (1 + QUANTILE_ACCURACY) / (1 - QUANTILE_ACCURACY)
+SKETCH_MAX_BINS = 512
+QUEUE_STATS_SAVE_INTERVAL = 300
+QUEUE_STATS_SETTING = "queue_stats"
+
+class QuantileSketch:
+    # Log-bucketed sketch (as in DDSketch): a value x lands in bucket
+    # ceil(log_gamma(x)), so memory grows with log(max / min) rather than with
+    # the number of values. Waits under a second go to a separate zero count.
+    # Past SKETCH_MAX_BINS the lowest buckets are merged upwards.
+    def __init__(self, bins=None, zeros=0):
+        self.bins = bins or {} # bucket index -> count
+        self.zeros = zeros
+        self.count = zeros + sum(self.bins.values())
+
+    def add(self, value):
+        self.count += 1
+        if value < 1:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value, SKETCH_GAMMA))
+        self.bins[index] = self.bins.get(index, 0) + 1
+        if len(self.bins) > SKETCH_MAX_BINS:
+            lowest = min(self.bins)
+            merged = self.bins.pop(lowest)
+            self.bins[min(self.bins)] += merged
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return 2 * SKETCH_GAMMA ** index / (SKETCH_GAMMA + 1)
+        return 2 * SKETCH_GAMMA ** max(self.bins) / (SKETCH_GAMMA + 1)
+
+    def to_dict(self):
+        return {'zeros': self.zeros, 'bins': {str(k): v for k, v in self.bins.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({int(k): v for k, v in data.get('bins', {}).items()}, data.get('zeros', 0))
+
+class GuildQueueStats:
+    def __init__(self, data=None):
+        data = data or {}
+        self.waits = {block: QuantileSketch.from_dict(d) for block, d in data.get('waits', {}).items()}
+        self.by_editor = dict(data.get('by_editor', {})) # str(user_id) -> assignments
+        self.by_type = dict(data.get('by_type', {})) # file type -> assignments
+        self.depth_area = list(data.get('depth_area', [0.0] * 24)) # editor-seconds per EST hour
+        self.depth_time = list(data.get('depth_time', [0.0] * 24)) # seconds observed per EST hour
+        self.max_depth = data.get('max_depth', 0)
+        self.depth = data.get('depth', 0)
+        self.depth_at = data.get('depth_at')
+        self.since = data.get('since', time.time())
+
+    def track_depth(self, depth, now):
+        if self.depth_at is not None:
+            # Capped so bot downtime isn't counted at the last known depth
+            elapsed = min(max(now - self.depth_at, 0), 3600)
+            hour = datetime.fromtimestamp(self.depth_at, EST).hour
+            self.depth_area[hour] += self.depth * elapsed
+            self.depth_time[hour] += elapsed
+        self.depth = depth
+        self.depth_at = now
+        self.max_depth = max(self.max_depth, depth)
+
+    def to_dict(self):
+        return {
+            'waits': {block: sketch.to_dict() for block, sketch in self.waits.items()},
+            'by_editor': dict(self.by_editor), 'by_type': dict(self.by_type),
+            'depth_area': list(self.depth_area), 'depth_time': list(self.depth_time),
+            'max_depth': self.max_depth, 'depth': self.depth, 'depth_at': self.depth_at,
+            'since': self.since,
+        }
 
-def save_config():
-    try:
-        with open(CONFIG_FILE, "w") as f:
-            json.dump(server_configs, f, indent=4)
-    except Exception as e:
-        print(f"Failed to save config: {e}")
+class QueueStats:
+    def __init__(self):
+        self.guilds = {} # guild_id -> GuildQueueStats
+        self._saved_at = {} # guild_id -> time of the last snapshot
+
+    def attach(self, storage):
+        self.guilds = {int(guild_id): GuildQueueStats(settings[QUEUE_STATS_SETTING])
+                       for guild_id, settings in storage.settings.items() if QUEUE_STATS_SETTING in settings}
+        storage.listener = self
+
+    def for_guild(self, guild_id):
+        stats = self.guilds.get(guild_id)
+        if stats is None:
+            stats = self.guilds[guild_id] = GuildQueueStats()
+        return stats
+
+    def queue_changed(self, guild_id, op, entry, depth):
+        now = time.time()
+        stats = self.for_guild(guild_id)
+        stats.track_depth(depth, now)
+        if op == 'assign' and entry.get('time'):
+            block = entry.get('time_block') or "N/A"
+            sketch = stats.waits.get(block)
+            if sketch is None:
+                sketch = stats.waits[block] = QuantileSketch()
+            sketch.add(max(now - entry['time'], 0))
+        self._touch(guild_id, now)
+
+    def assigned(self, guild_id, user_id, file_type):
+        stats = self.for_guild(guild_id)
+        stats.by_editor[str(user_id)] = stats.by_editor.get(str(user_id), 0) + 1
+        stats.by_type[file_type] = stats.by_type.get(file_type, 0) + 1
+        self._touch(guild_id, time.time())
+
+    def _touch(self, guild_id, now):
+        if now - self._saved_at.get(guild_id, 0) >= QUEUE_STATS_SAVE_INTERVAL:
+            self.save(guild_id)
+
+    def save(self, guild_id):
+        self._saved_at[guild_id] = time.time()
+        storage.set_guild_setting(guild_id, QUEUE_STATS_SETTING, self.guilds[guild_id].to_dict())
+
+    def save_all(self):
+        for guild_id in self.guilds:
+            self.save(guild_id)
+
+queue_stats = QueueStats()
 
 # --- HELPER FUNCTIONS ---
 def check_swc_role(member: discord.Member) -> bool:
@@ -158,24 +1842,93 @@ def format_seconds(seconds):
     h, m = divmod(m, 60)
     return f"{h:02d}:{m:02d}:{s:02d}"
 
-def calculate_tats(file_type, total_seconds):
-    fr_tat = 0
-    sv_tat = 0
-    overall_tat = 0
-
-    if "HP" in file_type:
-        overall_tat = 90 * 60 
-        return {"FR": "N/A", "SV": "N/A", "OVERALL": "01:30:00"}
-    else:
-        fr_tat = total_seconds * 0.5
-        sv_tat = total_seconds * 1.5
-        overall_tat = total_seconds * 2.0
-        
-    return {
-        "FR": format_seconds(fr_tat),
-        "SV": format_seconds(sv_tat),
-        "OVERALL": format_seconds(overall_tat)
-    }
+# --- TAT RULES ---
+# TATs come from a rule table keyed by file type. A rule gives a multiplier of
+# the audio length per stage, and "fixed" overrides a stage with a set number
+# of seconds; a stage with neither doesn't apply (shown as N/A). "default"
+# covers file types without their own rule. Guilds can override rules per
+# file type with /settatrule (stored as the 'tat_rules' guild setting); each
+# guild's table is compiled once into a per-type tuple and recompiled only
+# when the setting changes.
+TAT_STAGES = ("FR", "SV", "OVERALL")
+DEFAULT_TAT_RULES = {
+    "default": {"FR": 0.5, "SV": 1.5, "OVERALL": 2.0},
+    "HP FILE": {"fixed": {"OVERALL": 90 * 60}},
+}
+TAT_BATCH_MAX = 5000 # rows per /tattimer batch
+
+class TatRules:
+    def __init__(self, overrides=None):
+        rules = {**DEFAULT_TAT_RULES, **(overrides or {})}
+        # file type -> ((multiplier, fixed seconds) per stage)
+        self._compiled = {file_type: self._compile(rule) for file_type, rule in rules.items()}
+        self._default = self._compiled["default"]
+
+    @staticmethod
+    def _compile(rule):
+        fixed = rule.get("fixed", {})
+        return tuple((rule.get(stage, 0), fixed.get(stage)) for stage in TAT_STAGES)
+
+    def durations(self, file_type, total_seconds):
+        # TATs in seconds; 0 means the stage doesn't apply
+        compiled = self._compiled.get(file_type, self._default)
+        return {stage: fixed if fixed is not None else total_seconds * multiplier
+                for stage, (multiplier, fixed) in zip(TAT_STAGES, compiled)}
+
+    def batch(self, files):
+        # files: iterable of (file_type, total_seconds); one result dict per file
+        return [self.durations(file_type, total_seconds) for file_type, total_seconds in files]
+
+_tat_rules_cache = {} # guild_id -> (overrides it was compiled from, TatRules)
+
+def tat_rules_for(guild_id=None):
+    overrides = storage.guild_setting(guild_id, 'tat_rules') if guild_id is not None else None
+    cached = _tat_rules_cache.get(guild_id)
+    if cached is None or cached[0] is not overrides:
+        cached = _tat_rules_cache[guild_id] = (overrides, TatRules(overrides))
+    return cached[1]
+
+def tat_durations(file_type, total_seconds, guild_id=None):
+    return tat_rules_for(guild_id).durations(file_type, total_seconds)
+
+def calculate_tats(file_type, total_seconds, guild_id=None):
+    return {stage: format_seconds(seconds) for stage, seconds in tat_durations(file_type, total_seconds, guild_id).items()}
+
+def parse_tat_batch(rows, default_type):
+    # rows: lists of cells from a pasted list or CSV. Each row needs one cell
+    # with an audio length; a cell naming a file type overrides default_type and
+    # the first other non-empty cell is kept as the file name. Header rows and
+    # rows without a length are skipped. Returns (files, skipped) where files
+    # are (name, file_type, audio_length, total_seconds).
+    files, skipped = [], 0
+    for cells in rows:
+        name, file_type, length, total_seconds = None, default_type, None, None
+        for cell in cells:
+            cell = cell.strip()
+            if not cell:
+                continue
+            seconds = parse_audio_time(cell) if total_seconds is None else None
+            cell_type = parse_file_type(cell) if seconds is None else None
+            if seconds is not None:
+                length, total_seconds = cell, seconds
+            elif cell_type:
+                file_type = cell_type
+            elif name is None:
+                name = cell
+        if total_seconds is None:
+            skipped += 1
+            continue
+        files.append((name, file_type, length, total_seconds))
+    return files, skipped
+
+def tat_batch_csv(files, guild_id=None):
+    results = tat_rules_for(guild_id).batch((file_type, total_seconds) for _, file_type, _, total_seconds in files)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["name", "file_type", "audio_length", "audio_hours", "fr_tat", "sv_tat", "overall_tat"])
+    for (name, file_type, length, total_seconds), tats in zip(files, results):
+        writer.writerow([name or "", file_type, length, f"{total_seconds / 3600:.2f}"] + [format_seconds(tats[stage]) for stage in TAT_STAGES])
+    return out.getvalue()
 
 # --- UPDATED LOGGING SYSTEM ---
 # Map log types to channel keys in config
@@ -189,103 +1942,371 @@ LOG_CHANNELS = {
     "requests": "request-reports-logs"
 }
 
+# Plain embed logs are buffered per channel and posted together, up to
+# LOG_BATCH_SIZE embeds (and Discord's 6000 character total) per message. A
+# channel's buffer is sent when it fills up, LOG_BATCH_WINDOW seconds after
+# its first embed arrived, or on shutdown.
+LOG_BATCH_SIZE = 10
+LOG_BATCH_WINDOW = 1.0
+LOG_BATCH_CHARS = 6000
+
+class LogBatcher:
+    def __init__(self, window=LOG_BATCH_WINDOW):
+        self.window = window
+        self._buffers = {} # channel_id -> (channel, [embed, ...])
+        self._timers = {} # channel_id -> task sending that buffer after the window
+        self._locks = {} # channel_id -> lock keeping that channel's messages in order
+        self._sending = set()
+        self.embeds = 0
+        self.messages = 0
+
+    def add(self, channel, embed):
+        _, embeds = self._buffers.setdefault(channel.id, (channel, []))
+        embeds.append(embed)
+        self.embeds += 1
+        if len(embeds) >= LOG_BATCH_SIZE:
+            self._spawn(self.flush(channel.id))
+        elif channel.id not in self._timers:
+            self._timers[channel.id] = asyncio.create_task(self._flush_later(channel.id))
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _flush_later(self, channel_id):
+        await asyncio.sleep(self.window)
+        self._timers.pop(channel_id, None)
+        await self.flush(channel_id)
+
+    async def flush(self, channel_id):
+        timer = self._timers.pop(channel_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        lock = self._locks.setdefault(channel_id, asyncio.Lock())
+        async with lock:
+            channel, embeds = self._buffers.pop(channel_id, (None, []))
+            while embeds:
+                batch, size = [], 0
+                while embeds and len(batch) < LOG_BATCH_SIZE and (not batch or size + len(embeds[0]) <= LOG_BATCH_CHARS):
+                    size += len(embeds[0])
+                    batch.append(embeds.pop(0))
+                try:
+                    await outbound.send(LANE_LOG, "log", channel.send, embeds=batch)
+                    self.messages += 1
+                except discord.NotFound:
+                    log_router.invalidate(channel.guild.id)
+                    print(f"Log channel {channel_id} is gone; dropped {len(batch)} log embed(s)")
+                except Exception as e:
+                    print(f"Failed to send {len(batch)} log embed(s) to {channel_id}: {e}")
+
+    async def close(self):
+        for channel_id in list(self._buffers):
+            await self.flush(channel_id)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+log_batcher = LogBatcher()
+
+# Compiled routing table: guild_id -> {log_type: channel object, or None when
+# the route is unconfigured or its channel no longer resolves}. A guild's table
+# is built from its config on first use and rebuilt after /setlogchannels or a
+# channel create/update/delete, so send_log is a single dict lookup and a
+# broken route is not re-resolved on every event.
+class LogRouter:
+    def __init__(self):
+        self._routes = {}
+        self.misses = {} # (guild_id, log_type) -> number of logs dropped
+        self.builds = 0
+
+    def _compile(self, guild):
+        # storage.configs[guild_id] is a dictionary of {log_type: channel_id},
+        # or a single channel id for legacy configs that log everything there
+        guild_config = storage.configs.get(str(guild.id))
+        table = {}
+        for log_type in LOG_CHANNELS:
+            if isinstance(guild_config, int):
+                channel_id = guild_config
+            elif guild_config:
+                channel_id = guild_config.get(log_type)
+            else:
+                channel_id = None
+            table[log_type] = guild.get_channel(channel_id) if channel_id else None
+        self._routes[guild.id] = table
+        self.builds += 1
+        return table
+
+    def resolve(self, guild, log_type):
+        table = self._routes.get(guild.id)
+        if table is None:
+            table = self._compile(guild)
+        channel = table.get(log_type)
+        if channel is None:
+            key = (guild.id, log_type)
+            self.misses[key] = self.misses.get(key, 0) + 1
+        return channel
+
+    def invalidate(self, guild_id=None):
+        if guild_id is None:
+            self._routes.clear()
+        else:
+            self._routes.pop(guild_id, None)
+
+    def report(self):
+        return "\n".join(f"{guild_id}/{log_type}: {count} dropped"
+                         for (guild_id, log_type), count in sorted(self.misses.items()))
+
+log_router = LogRouter()
+
 async def send_log(guild, log_type: str, content=None, embed=None, view=None):
     if not guild: return False
-    guild_id_str = str(guild.id)
-    
-    # Check if this guild has configs
-    if guild_id_str not in server_configs:
-        return False
-        
-    # Get the specific channel ID for this log type
-    # server_configs[guild_id] is now a dictionary of {log_type: channel_id}
-    guild_config = server_configs[guild_id_str]
-    
-    # Handle legacy config (single channel) vs new config (dict)
-    if isinstance(guild_config, int):
-        # Legacy: send everything to the one channel
-        channel_id = guild_config
-    else:
-        # New: find the specific channel
-        channel_id = guild_config.get(log_type)
-    
-    if not channel_id:
-        return False
 
-    channel = guild.get_channel(channel_id)
+    channel = log_router.resolve(guild, log_type)
     if channel:
+        if embed is not None and content is None and view is None:
+            log_batcher.add(channel, embed)
+            return True
         try:
-            await channel.send(content=content, embed=embed, view=view)
+            # Anything already buffered for this channel goes out first
+            await log_batcher.flush(channel.id)
+            await outbound.send(LANE_LOG, "log", channel.send, content=content, embed=embed, view=view)
             return True
+        except discord.NotFound:
+            # Deleted without us seeing the event; re-resolve next time
+            log_router.invalidate(guild.id)
+            return False
         except:
             return False
     return False
 
+# --- SCHEDULER ---
+# One timer task for everything that has to happen at a point in time (TAT
+# alerts, receipt-confirmation expiry). Pending work lives in storage as tracked
+# records; the scheduler keeps a min-heap of (fire_at, seq, kind, record id,
+# state) and sleeps until the earliest entry, so each in-flight assignment costs
+# a heap entry rather than its own sleeping task. Entries are never removed
+# early: one whose record is gone or has changed state is skipped when it
+# comes up, and each handler schedules the record's next event itself.
+class Scheduler:
+    def __init__(self):
+        self._heap = []
+        self._seq = 0
+        self._wake = None
+        self._task = None
+        self._handlers = {} # kind -> (fire_at(record), async handler(record))
+
+    def register(self, kind, fire_at, handler):
+        self._handlers[kind] = (fire_at, handler)
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def load(self):
+        # Rebuild the heap from the records storage loaded from disk
+        self._heap = []
+        for kind in self._handlers:
+            for record in storage.tracked[kind].values():
+                self.schedule(kind, record)
+        if self._wake is not None:
+            self._wake.set()
+
+    def schedule(self, kind, record):
+        fire_at = self._handlers[kind][0](record)
+        self._seq += 1
+        earliest = not self._heap or fire_at < self._heap[0][0]
+        heapq.heappush(self._heap, (fire_at, self._seq, kind, record['id'], record.get('state')))
+        if earliest and self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        while True:
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            _, _, kind, record_id, state = heapq.heappop(self._heap)
+            record = storage.tracked[kind].get(record_id)
+            if record is None or record.get('state') != state:
+                continue
+            try:
+                await self._handlers[kind][1](record)
+            except Exception as e:
+                print(f"Scheduled {kind} event for {record_id} failed: {e}")
+
+scheduler = Scheduler()
+
+# --- TAT DEADLINES ---
+# Every assignment with a known overall TAT (a fixed one such as HP files', or
+# any file given an audio length) gets a deadline record. It is flagged at risk once AT_RISK_FRACTION of its
+# overall TAT has passed and as breached at the deadline, both in the
+# reassignment log. /filedone (or a reassignment notice) stops tracking.
+AT_RISK_FRACTION = 0.8
+
+class DeadlineTracker:
+    def __init__(self):
+        self.at_risk = 0
+        self.breached = 0
+        scheduler.register('deadlines', self._fire_at, self._fire)
+
+    def track(self, assignment):
+        total_seconds = parse_audio_time(assignment['audio_length']) if assignment.get('audio_length') else None
+        tats = tat_durations(assignment['file_type'], total_seconds or 0, assignment['guild_id'])
+        if not tats['OVERALL']:
+            return None
+        assigned_at = assignment['assigned_at']
+        record = {
+            'id': assignment['id'],
+            'guild_id': assignment['guild_id'],
+            'channel_id': assignment['channel_id'],
+            'user_id': assignment['user_id'],
+            'file_type': assignment['file_type'],
+            'file_name': assignment.get('file_name'),
+            'assigned_at': assigned_at,
+            'fr_due': int(assigned_at + tats['FR']) if tats['FR'] else None,
+            'sv_due': int(assigned_at + tats['SV']) if tats['SV'] else None,
+            'at_risk_at': int(assigned_at + tats['OVERALL'] * AT_RISK_FRACTION),
+            'due_at': int(assigned_at + tats['OVERALL']),
+            'state': 'open'
+        }
+        storage.track('deadlines', record)
+        scheduler.schedule('deadlines', record)
+        return record
+
+    def complete(self, assignment_id):
+        return storage.untrack('deadlines', assignment_id)
+
+    def open_for(self, guild_id, user_id):
+        # Most recently assigned first
+        records = [r for r in storage.deadlines.values() if r['guild_id'] == guild_id and r['user_id'] == user_id]
+        return sorted(records, key=lambda r: r['assigned_at'], reverse=True)
+
+    def _fire_at(self, record):
+        return record['at_risk_at'] if record['state'] == 'open' else record['due_at']
+
+    async def _fire(self, record):
+        if record['state'] == 'open' and time.time() < record['due_at']:
+            self.at_risk += 1
+            record = {**record, 'state': 'at_risk'}
+            storage.track('deadlines', record)
+            scheduler.schedule('deadlines', record)
+            title, color = "⚠️ File At Risk", discord.Color.orange()
+        else:
+            self.breached += 1
+            storage.untrack('deadlines', record['id'])
+            title, color = "🚨 TAT Breached", discord.Color.red()
+
+        guild = bot.get_guild(record['guild_id'])
+        if guild is None:
+            return
+        log_embed = discord.Embed(title=title, color=color)
+        log_embed.add_field(name="Editor", value=f"<@{record['user_id']}>", inline=True)
+        log_embed.add_field(name="File Type", value=record['file_type'], inline=True)
+        if record['file_name']: log_embed.add_field(name="File Name", value=record['file_name'], inline=False)
+        log_embed.add_field(name="Assigned", value=f"<t:{record['assigned_at']}:R>", inline=True)
+        if record['fr_due']: log_embed.add_field(name="FR Due", value=f"<t:{record['fr_due']}:R>", inline=True)
+        if record['sv_due']: log_embed.add_field(name="SV Due", value=f"<t:{record['sv_due']}:R>", inline=True)
+        log_embed.add_field(name="Overall Due", value=f"<t:{record['due_at']}:R>", inline=True)
+        log_embed.set_footer(text=f"Assignment {record['id']}")
+        await send_log(guild, "reassignment", embed=log_embed)
+
+deadline_tracker = DeadlineTracker()
+
 # --- ASSIGNMENT SYSTEM (UPDATED EDIT LOGIC) ---
+# Receipt confirmation buttons are DynamicItems whose custom_id carries the
+# assignment id ("receipt:ok:<id>"). They are registered once in setup_hook,
+# so they work for any assignment message, including ones sent before a
+# restart. What they need (editor, message, original text) is a 'receipts'
+# record in storage, and the confirmation window is one scheduler entry.
+RECEIPT_TIMEOUT = 300 # 5 Min Timeout
+RECEIPT_CLOSED = "⌛ This assignment is no longer waiting for confirmation."
+
+async def edit_receipt_message(record, content):
+    channel = bot.get_channel(record['channel_id'])
+    if channel is not None:
+        await channel.get_partial_message(record['message_id']).edit(content=content, view=None)
+
+async def expire_receipt(record):
+    storage.untrack('receipts', record['id'])
+    try:
+        await edit_receipt_message(record, f"{record['content']}\n\n**Editor failed to confirm receipt within 5 minutes.**")
+    except:
+        pass
+
+scheduler.register('receipts', lambda record: record['expires_at'], expire_receipt)
 
 class ReceiptModal(ui.Modal, title="Confirm File Receipt"):
     file_name_input = ui.TextInput(label="File Name", placeholder="Enter the exact file name...")
 
+    def __init__(self, assignment_id):
+        super().__init__()
+        self.assignment_id = assignment_id
+
     async def on_submit(self, interaction: discord.Interaction):
-        # We need access to the view to edit the original message
-        if hasattr(self, 'view_ref'):
-            view = self.view_ref
-            view.stop()
-            
-            # Construct the final message content
-            # We keep the original content (passed via view) and append the status
-            final_content = f"{view.original_content}\n\n**Editor confirms receipt of {self.file_name_input.value}**"
-            
-            try:
-                # Edit the ORIGINAL message to remove buttons and show status
-                if view.message:
-                    await view.message.edit(content=final_content, view=None)
-            except Exception as e:
-                print(f"Failed to edit message: {e}")
+        record = storage.receipts.get(self.assignment_id)
+        if record is None:
+            await interaction.response.send_message(RECEIPT_CLOSED, ephemeral=True)
+            return
+        storage.untrack('receipts', record['id'])
+
+        # We keep the original content (from the record) and append the status
+        final_content = f"{record['content']}\n\n**Editor confirms receipt of {self.file_name_input.value}**"
+        try:
+            # Edit the ORIGINAL message to remove buttons and show status
+            await edit_receipt_message(record, final_content)
+        except Exception as e:
+            print(f"Failed to edit message: {e}")
 
         # Send an ephemeral confirmation to the user so they know it worked
         await interaction.response.send_message(f"✅ Receipt confirmed for **{self.file_name_input.value}**", ephemeral=True)
 
-class AssignmentConfirmView(ui.View):
-    def __init__(self, assigned_user_id, channel, assigned_user_mention, original_content):
-        super().__init__(timeout=300) # 5 Min Timeout
-        self.assigned_user_id = assigned_user_id
-        self.channel = channel
-        self.assigned_user_mention = assigned_user_mention
-        self.original_content = original_content # Store the initial message text
-        self.message = None 
+class ReceiptButton(ui.DynamicItem[ui.Button], template=r"receipt:(?P<action>ok|no):(?P<id>[0-9a-f]+)"):
+    def __init__(self, action, assignment_id):
+        if action == "ok":
+            button = ui.Button(label="Received", style=discord.ButtonStyle.green, emoji="📥", custom_id=f"receipt:ok:{assignment_id}")
+        else:
+            button = ui.Button(label="Not Received", style=discord.ButtonStyle.red, emoji="❌", custom_id=f"receipt:no:{assignment_id}")
+        super().__init__(button)
+        self.action = action
+        self.assignment_id = assignment_id
 
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.assigned_user_id:
-            await interaction.response.send_message("⛔ You cannot verify a file assigned to someone else.", ephemeral=True)
-            return False
-        return True
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(match['action'], match['id'])
 
-    async def on_timeout(self):
-        self.stop()
-        text = f"{self.original_content}\n\n**Editor failed to confirm receipt within 5 minutes.**"
-        if self.message:
-            try:
-                await self.message.edit(content=text, view=None)
-            except:
-                pass 
+    async def callback(self, interaction: discord.Interaction):
+        record = storage.receipts.get(self.assignment_id)
+        if record is None:
+            await interaction.response.send_message(RECEIPT_CLOSED, ephemeral=True)
+            return
+        if interaction.user.id != record['user_id']:
+            await interaction.response.send_message("⛔ You cannot verify a file assigned to someone else.", ephemeral=True)
+            return
 
-    @ui.button(label="Received", style=discord.ButtonStyle.green, emoji="📥")
-    async def received_btn(self, interaction: discord.Interaction, button: ui.Button):
-        modal = ReceiptModal()
-        modal.view_ref = self # Pass reference to self so modal can edit the message
-        await interaction.response.send_modal(modal)
+        if self.action == "ok":
+            await interaction.response.send_modal(ReceiptModal(self.assignment_id))
+            return
 
-    @ui.button(label="Not Received", style=discord.ButtonStyle.red, emoji="❌")
-    async def not_received_btn(self, interaction: discord.Interaction, button: ui.Button):
-        self.stop()
-        text = f"{self.original_content}\n\n**Editor claims that they did not receive a file. Please refresh.**"
+        storage.untrack('receipts', record['id'])
+        text = f"{record['content']}\n\n**Editor claims that they did not receive a file. Please refresh.**"
         try:
             await interaction.message.edit(content=text, view=None)
         except:
             pass
         await interaction.response.send_message("❌ Status updated.", ephemeral=True)
 
+def receipt_view(assignment_id):
+    # Only dynamic items, so discord.py doesn't keep the view around per message
+    view = ui.View(timeout=None)
+    view.add_item(ReceiptButton("ok", assignment_id))
+    view.add_item(ReceiptButton("no", assignment_id))
+    return view
+
 # --- RESTORED: ASSIGN VIEW FOR CONTEXT MENU ---
 class AssignView(ui.View):
     def __init__(self, member: discord.Member, channel):
@@ -310,15 +2331,33 @@ class AssignView(ui.View):
         await interaction.followup.send(f"Assigned {file_type} to {self.member.display_name}", ephemeral=True)
 
 # --- CORE ASSIGN LOGIC ---
-async def assign_logic(user, file_type, channel, assigner, file_name=None, audio_length=None):
-    time_tag = get_time_tag()
-    global work_queue
-    in_queue = False
-    
-    if any(item['user_id'] == user.id for item in work_queue):
-        work_queue = [item for item in work_queue if item['user_id'] != user.id]
-        save_queue()
-        in_queue = True
+def new_assignment(user, file_type, channel, assigner, file_name, audio_length, in_queue):
+    return {
+        'id': uuid.uuid4().hex[:12],
+        'guild_id': channel.guild.id if channel.guild else None,
+        'channel_id': channel.id,
+        'user_id': user.id,
+        'file_type': file_type,
+        'file_name': file_name,
+        'audio_length': audio_length,
+        'assigned_by': assigner.id,
+        'assigned_at': int(datetime.now().timestamp()),
+        'in_queue': in_queue
+    }
+
+def save_assignment(assignment):
+    # Called once the public message is out, so a failed send records nothing
+    storage.record_assignment(assignment)
+    audit_log.record(assignment['guild_id'], 'assign', assignment=assignment)
+    deadline_tracker.track(assignment)
+    if assignment['guild_id']:
+        queue_stats.assigned(assignment['guild_id'], assignment['user_id'], assignment['file_type'])
+
+async def post_assignment(assignment, user, channel, time_tag):
+    # Public message with the receipt buttons. Returns its jump URL for the DM.
+    file_type = assignment['file_type']
+    file_name = assignment['file_name']
+    audio_length = assignment['audio_length']
 
     # Base Content
     msg_content = f"💼 {user.mention} has been assigned a **{file_type}** at {time_tag}."
@@ -326,15 +2365,13 @@ async def assign_logic(user, file_type, channel, assigner, file_name=None, audio
     # Store clean content for editing later
     base_msg_content_for_view = msg_content + "\nPlease be mindful of your TATs."
     
-    view = AssignmentConfirmView(user.id, channel, user.mention, base_msg_content_for_view)
-    
     footer_text = "Please be mindful of your TATs."
     embed = None
     
     if file_name and audio_length:
         total_seconds = parse_audio_time(audio_length)
         if total_seconds:
-            tats = calculate_tats(file_type, total_seconds)
+            tats = calculate_tats(file_type, total_seconds, assignment['guild_id'])
             embed = discord.Embed(color=discord.Color.blue())
             embed.set_footer(text=f"TAT Info | Audio: {audio_length}\nFR: {tats['FR']} | SV: {tats['SV']} | OVERALL: {tats['OVERALL']}\n\n{footer_text}")
     
@@ -343,10 +2380,21 @@ async def assign_logic(user, file_type, channel, assigner, file_name=None, audio
     elif embed and not embed.footer.text:
           embed.set_footer(text=footer_text)
 
-    public_msg = await channel.send(content=msg_content, embed=embed, view=view)
-    view.message = public_msg 
-    jump_url = public_msg.jump_url
+    public_msg = await outbound.send(LANE_USER, "assign:public", channel.send, content=msg_content, embed=embed, view=receipt_view(assignment['id']))
+    receipt = {
+        'id': assignment['id'],
+        'guild_id': assignment['guild_id'],
+        'channel_id': channel.id,
+        'message_id': public_msg.id,
+        'user_id': user.id,
+        'content': base_msg_content_for_view,
+        'expires_at': int(time.time()) + RECEIPT_TIMEOUT
+    }
+    storage.track('receipts', receipt)
+    scheduler.schedule('receipts', receipt)
+    return public_msg.jump_url
 
+async def dm_assignment(user, file_type, channel, time_tag, jump_url):
     dm_content = (
         f"# Hello {user.mention}!\n"
         f"# You have been assigned a **{file_type}** at {time_tag}.\n\n" 
@@ -357,9 +2405,35 @@ async def assign_logic(user, file_type, channel, assigner, file_name=None, audio
     )
 
     try:
-        await user.send(dm_content)
+        await outbound.send(LANE_USER, "assign:dm", user.send, dm_content)
     except discord.Forbidden:
-        await channel.send(f"⚠️ {user.mention} (I cannot DM you) — You have been assigned a **{file_type}** at {time_tag}.")
+        await outbound.send(LANE_USER, "assign:dm-fallback", channel.send, f"⚠️ {user.mention} (I cannot DM you) — You have been assigned a **{file_type}** at {time_tag}.")
+
+class AssignmentNotPosted(Exception):
+    # The public assignment message couldn't be sent. Nothing was recorded and
+    # an editor taken off the queue for it is back at the head of the queue.
+    pass
+
+async def assign_logic(user, file_type, channel, assigner, file_name=None, audio_length=None, dequeued=None):
+    # dequeued is the queue entry when the caller already took the editor off the queue
+    started = time.perf_counter()
+    time_tag = get_time_tag()
+    entry = dequeued
+    if entry is None:
+        entry = await queue_executor.submit(channel.guild.id, leave_queue, channel.guild.id, user.id, 'dequeue')
+    in_queue = entry is not None
+
+    assignment = new_assignment(user, file_type, channel, assigner, file_name, audio_length, in_queue)
+
+    # The public message goes first: the DM links to it
+    try:
+        jump_url = await post_assignment(assignment, user, channel, time_tag)
+    except Exception as e:
+        # Nothing was announced, so the editor keeps their place
+        if in_queue:
+            await queue_executor.submit(channel.guild.id, requeue_editor, channel.guild.id, entry)
+        raise AssignmentNotPosted(f"Assignment to {user.id} not posted: {e}") from e
+    save_assignment(assignment)
 
     log_embed = discord.Embed(title="File Assigned", color=discord.Color.green())
     log_embed.add_field(name="Editor", value=user.mention, inline=False)
@@ -368,7 +2442,298 @@ async def assign_logic(user, file_type, channel, assigner, file_name=None, audio
     log_embed.add_field(name="Assigned By", value=assigner.mention, inline=False)
     log_embed.set_footer(text=f"Was in queue: {in_queue}")
     
-    await send_log(channel.guild, "assignment", embed=log_embed)
+    # DM and log don't depend on each other, so they run side by side
+    await asyncio.gather(dm_assignment(user, file_type, channel, time_tag, jump_url),
+                         send_log(channel.guild, "assignment", embed=log_embed))
+    outbound.record("assign:total", time.perf_counter() - started)
+
+# --- BATCH ASSIGNMENT ---
+# /assignbatch hands a list of files to the next queued editors in FIFO order.
+# The editors are taken off the queue in one executor mutation (so the writer
+# persists them in one flush), every editor's message + DM runs concurrently,
+# and the whole batch is logged as a single embed.
+ASSIGN_BATCH_MAX = 25 # one log embed field per file
+
+def parse_file_type(token):
+    token = token.strip()
+    if token.upper() in EMOJI_MAP:
+        return EMOJI_MAP[token.upper()]
+    for choice in FILE_CHOICES:
+        if token.lower() in (choice.name.lower(), choice.value.lower()):
+            return choice.value
+    return None
+
+def parse_batch_lines(text):
+    # One file per line: "TYPE | file name | HH:MM:SS", name and length optional.
+    # Returns (files, errors) where files are (file_type, file_name, audio_length).
+    files, errors = [], []
+    for line_no, line in enumerate(text.splitlines(), 1):
+        if not line.strip():
+            continue
+        parts = [part.strip() for part in line.split("|")]
+        file_type = parse_file_type(parts[0])
+        if file_type is None:
+            errors.append(f"Line {line_no}: unknown file type `{parts[0]}`")
+            continue
+        file_name = parts[1] if len(parts) > 1 and parts[1] else None
+        audio_length = parts[2] if len(parts) > 2 and parts[2] else None
+        if audio_length and parse_audio_time(audio_length) is None:
+            errors.append(f"Line {line_no}: audio length `{audio_length}` is not HH:MM:SS")
+            continue
+        files.append((file_type, file_name, audio_length))
+    return files, errors
+
+def take_queue_heads(guild, count):
+    # Queue mutation: removes up to `count` editors from the front of the queue
+    # and returns them as (member, queue entry). Entries whose editor has left
+    # the server are skipped and stay queued for /remove.
+    taken = []
+    for entry in storage.queue_for(guild.id):
+        if len(taken) == count:
+            break
+        member = guild.get_member(entry['user_id'])
+        if member is not None:
+            taken.append((member, entry))
+    for member, _ in taken:
+        leave_queue(guild.id, member.id, 'dequeue')
+    return taken
+
+async def assign_batch(files, channel, assigner):
+    # Returns (assigned, failed): the (member, file) pairs that were assigned
+    # and the files whose assignment message couldn't be posted. Those editors
+    # go back to the head of the queue in their original order.
+    guild = channel.guild
+    started = time.perf_counter()
+    time_tag = get_time_tag()
+    editors = await queue_executor.submit(guild.id, take_queue_heads, guild, len(files))
+    pairs = [(member, entry, file) for (member, entry), file in zip(editors, files)]
+
+    async def deliver(member, file):
+        file_type, file_name, audio_length = file
+        assignment = new_assignment(member, file_type, channel, assigner, file_name, audio_length, True)
+        try:
+            jump_url = await post_assignment(assignment, member, channel, time_tag)
+        except Exception as e:
+            raise AssignmentNotPosted(f"Assignment to {member.id} not posted: {e}") from e
+        save_assignment(assignment)
+        await dm_assignment(member, file_type, channel, time_tag, jump_url)
+
+    results = await asyncio.gather(*(deliver(member, file) for member, _, file in pairs), return_exceptions=True)
+    assigned, failed, requeued = [], [], []
+    for (member, entry, file), result in zip(pairs, results):
+        if isinstance(result, AssignmentNotPosted):
+            print(f"Batch assignment failed: {result}")
+            failed.append(file)
+            requeued.append(entry)
+            continue
+        if isinstance(result, Exception):
+            # The public message is out, so the file counts as assigned
+            print(f"Batch assignment to {member.id} was posted but not delivered: {result}")
+        assigned.append((member, file))
+    if requeued:
+        await queue_executor.submit(guild.id, requeue_editors, guild.id, requeued)
+
+    if assigned:
+        log_embed = discord.Embed(title="Batch Assigned", description=f"{len(assigned)} file(s) assigned from the queue.", color=discord.Color.green())
+        for member, (file_type, file_name, audio_length) in assigned:
+            details = file_type if not file_name else f"{file_type} — {file_name}"
+            if audio_length: details += f" ({audio_length})"
+            log_embed.add_field(name=member.display_name, value=f"{member.mention}: {details}", inline=False)
+        log_embed.set_footer(text=f"Assigned by {assigner.display_name}")
+        await send_log(guild, "assignment", embed=log_embed)
+    outbound.record("assignbatch:total", time.perf_counter() - started)
+    return assigned, failed
+
+class AssignBatchModal(ui.Modal, title="Assign Batch"):
+    files = ui.TextInput(
+        label="Files (one per line: TYPE | name | HH:MM:SS)",
+        style=discord.TextStyle.paragraph,
+        placeholder="AL | Q3 Earnings Call | 01:02:03\nHP | Investor Day\nQB"
+    )
+
+    async def on_submit(self, interaction: discord.Interaction):
+        files, errors = parse_batch_lines(self.files.value)
+        if not errors and not files:
+            errors.append("No files listed.")
+        if len(files) > ASSIGN_BATCH_MAX:
+            errors.append(f"A batch can hold at most {ASSIGN_BATCH_MAX} files ({len(files)} given).")
+        if errors:
+            await interaction.response.send_message("❌ Nothing was assigned.\n" + "\n".join(errors), ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        assigned, failed = await assign_batch(files, interaction.channel, interaction.user)
+        summary = f"✅ Assigned {len(assigned)} of {len(files)} file(s)."
+        if failed:
+            summary += "\nCouldn't post the assignment for (the editors kept their place in the queue):\n" + "\n".join(
+                f"- {file_type}" + (f" — {file_name}" if file_name else "") for file_type, file_name, _ in failed)
+        unassigned = files[len(assigned) + len(failed):]
+        if unassigned:
+            summary += "\nNot enough editors in the queue for:\n" + "\n".join(
+                f"- {file_type}" + (f" — {file_name}" if file_name else "") for file_type, file_name, _ in unassigned)
+        await interaction.followup.send(summary, ephemeral=True)
+
+# --- FILE BACKLOG ---
+# Pending files waiting for an editor, one min-heap per guild ordered by
+# (priority, time added): Live files come before Batch and HP files, oldest
+# first within each. The dispatcher pairs the top file with the first queued
+# editor whose time block covers the current hour ("Unspecified" and admin
+# blocks always match) and runs assign_logic for them. If the assignment
+# message can't be sent, the file goes back on the backlog (and the editor
+# back to the head of the queue) for the next pass. Pending files are kept in
+# memory only: a restart drops them, which /backlog and the README warn about.
+LIVE_FILE_TYPES = {"AIERA LIVE FILE", "QUARTR LIVE FILE"}
+EST = timezone(timedelta(hours=-5)) # time block labels are in EST
+DISPATCH_INTERVAL = 60 # re-check at least this often so new time blocks are picked up
+DISPATCH_DRY_RUN = os.getenv("DISPATCH_DRY_RUN", "") == "1"
+
+def file_priority(file_type):
+    return 0 if file_type in LIVE_FILE_TYPES else 1
+
+def block_is_current(time_block, now=None):
+    try:
+        start, end = [int(part.strip().split(":")[0]) for part in time_block.replace("EST", "").split("-")]
+    except (ValueError, AttributeError):
+        return True
+    hour = (now or datetime.now(EST)).hour
+    return start <= hour < (end or 24)
+
+class FileBacklog:
+    def __init__(self):
+        self._heaps = {} # guild_id -> heap of (priority, added_at, seq, file)
+        self._dropped = set() # ids removed with /dropfile, skipped when popped
+        self._seq = 0
+
+    def add(self, guild_id, file):
+        self._seq += 1
+        heapq.heappush(self._heaps.setdefault(guild_id, []),
+                       (file_priority(file['file_type']), file['added_at'], self._seq, file))
+
+    def drop(self, guild_id, file_id):
+        for *_, file in self._heaps.get(guild_id, []):
+            if file['id'] == file_id and file_id not in self._dropped:
+                self._dropped.add(file_id)
+                return file
+        return None
+
+    def guild_ids(self):
+        return [guild_id for guild_id, heap in self._heaps.items() if heap]
+
+    def pending(self, guild_id):
+        return [item[-1] for item in sorted(self._heaps.get(guild_id, [])) if item[-1]['id'] not in self._dropped]
+
+    def _top(self, guild_id):
+        heap = self._heaps.get(guild_id, [])
+        while heap and heap[0][-1]['id'] in self._dropped:
+            self._dropped.discard(heapq.heappop(heap)[-1]['id'])
+        return heap[0][-1] if heap else None
+
+    def eligible_editors(self, guild):
+        now = datetime.now(EST)
+        for entry in storage.queue_for(guild.id):
+            member = guild.get_member(entry['user_id'])
+            if member is not None and block_is_current(entry.get('time_block'), now):
+                yield member
+
+    def pop_match(self, guild):
+        # Queue mutation: takes the top file and its editor off the backlog and
+        # the queue together, or returns None if either side is empty. Returns
+        # (file, member, the editor's queue entry).
+        file = self._top(guild.id)
+        if file is None:
+            return None
+        member = next(self.eligible_editors(guild), None)
+        if member is None:
+            return None
+        heapq.heappop(self._heaps[guild.id])
+        return file, member, leave_queue(guild.id, member.id, 'dequeue')
+
+    def plan(self, guild):
+        # Dry run: the pairings pop_match would make right now, without making them
+        return list(zip(self.pending(guild.id), self.eligible_editors(guild)))
+
+class BacklogDispatcher:
+    def __init__(self, backlog, dry_run=DISPATCH_DRY_RUN):
+        self.backlog = backlog
+        self.dry_run = dry_run
+        self._wake = None
+        self._task = None
+        self._announced = set() # file ids already reported in dry-run mode
+        self.started = time.time()
+        self.added = 0
+        self.dispatched = 0
+        self.dry_run_matches = 0
+        self.total_wait = 0.0 # seconds between a file being added and assigned
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def add(self, guild_id, file):
+        self.backlog.add(guild_id, file)
+        self.added += 1
+        self.wake()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), DISPATCH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            for guild_id in self.backlog.guild_ids():
+                guild = bot.get_guild(guild_id)
+                if guild is None:
+                    continue
+                try:
+                    await self.dispatch(guild)
+                except Exception as e:
+                    print(f"Dispatch failed in {guild_id}: {e}")
+
+    async def dispatch(self, guild):
+        if self.dry_run:
+            for file, member in self.backlog.plan(guild):
+                if file['id'] in self._announced:
+                    continue
+                self._announced.add(file['id'])
+                self.dry_run_matches += 1
+                log_embed = discord.Embed(title="Dispatch (Dry Run)", description=f"Would assign **{file['file_type']}** to {member.mention}.", color=discord.Color.light_grey())
+                if file['file_name']: log_embed.add_field(name="File Name", value=file['file_name'], inline=False)
+                log_embed.set_footer(text=f"File {file['id']}")
+                await send_log(guild, "assignment", embed=log_embed)
+            return
+
+        while True:
+            match = await queue_executor.submit(guild.id, self.backlog.pop_match, guild)
+            if match is None:
+                return
+            file, member, entry = match
+            try:
+                await assign_logic(member, file['file_type'], file['channel'], file['added_by'],
+                                   file['file_name'], file['audio_length'], dequeued=entry)
+            except AssignmentNotPosted:
+                # The editor is back at the head of the queue; the file goes back
+                # on the backlog and waits for the next pass
+                self.backlog.add(guild.id, file)
+                raise
+            self.dispatched += 1
+            self.total_wait += time.time() - file['added_at']
+
+    def report(self):
+        hours = max(time.time() - self.started, 1) / 3600
+        avg_wait = self.total_wait / self.dispatched if self.dispatched else 0
+        mode = "dry run" if self.dry_run else "live"
+        return (f"Mode: {mode} | Added: {self.added} | Dispatched: {self.dispatched} "
+                f"({self.dispatched / hours:.1f}/h) | Avg wait: {format_seconds(avg_wait)}"
+                + (f" | Dry-run matches: {self.dry_run_matches}" if self.dry_run else ""))
+
+file_backlog = FileBacklog()
+dispatcher = BacklogDispatcher(file_backlog)
 
 # --- MODALS ---
 class AvailabilityModal(ui.Modal):
@@ -494,7 +2859,7 @@ class RevertView(ui.View):
     async def send_dm(self, interaction, status):
         log_url = interaction.message.jump_url
         try:
-            await self.target_user.send(f"Hello {self.target_user.mention}, your [revert request]({log_url}) was **{status}**.")
+            await outbound.send(LANE_USER, "dm:revert", self.target_user.send, f"Hello {self.target_user.mention}, your [revert request]({log_url}) was **{status}**.")
         except:
             await interaction.followup.send("❌ Could not DM user.", ephemeral=True)
 
@@ -502,6 +2867,8 @@ class RevertView(ui.View):
     async def approve(self, interaction: discord.Interaction, button: ui.Button):
         if not is_swc(interaction): return await interaction.response.send_message("⛔ SWC Only", ephemeral=True)
         await interaction.response.defer()
+        audit_log.record(interaction.guild_id, 'revert', status='approved', user_id=self.target_user.id if self.target_user else None,
+                         by=interaction.user.id, message_id=interaction.message.id)
         await self.send_dm(interaction, "APPROVED")
         new_content = self.original_msg_content.replace("## Revert Request", "## Revert Request [APPROVED]")
         self.clear_items()
@@ -513,6 +2880,8 @@ class RevertView(ui.View):
     async def deny(self, interaction: discord.Interaction, button: ui.Button):
         if not is_swc(interaction): return await interaction.response.send_message("⛔ SWC Only", ephemeral=True)
         await interaction.response.defer()
+        audit_log.record(interaction.guild_id, 'revert', status='denied', user_id=self.target_user.id if self.target_user else None,
+                         by=interaction.user.id, message_id=interaction.message.id)
         await self.send_dm(interaction, "DENIED")
         new_content = self.original_msg_content.replace("## Revert Request", "## Revert Request [DENIED]")
         self.clear_items()
@@ -529,7 +2898,7 @@ class ReworkView(ui.View):
     async def send_dm(self, interaction, status):
         log_url = interaction.message.jump_url
         try:
-            await self.target_user.send(f"Hello {self.target_user.mention}, your [rework report]({log_url}) was **{status}**.")
+            await outbound.send(LANE_USER, "dm:rework", self.target_user.send, f"Hello {self.target_user.mention}, your [rework report]({log_url}) was **{status}**.")
         except:
             await interaction.followup.send("❌ Could not DM user.", ephemeral=True)
 
@@ -537,6 +2906,8 @@ class ReworkView(ui.View):
     async def validate(self, interaction: discord.Interaction, button: ui.Button):
         if not is_swc(interaction): return await interaction.response.send_message("⛔ SWC Only", ephemeral=True)
         await interaction.response.defer()
+        audit_log.record(interaction.guild_id, 'rework', status='validated', user_id=self.target_user.id if self.target_user else None,
+                         by=interaction.user.id, message_id=interaction.message.id)
         await self.send_dm(interaction, "VALIDATED")
         new_content = self.original_msg_content.replace("## Rework Report", "## Rework Report [VALIDATED]")
         self.clear_items()
@@ -548,6 +2919,8 @@ class ReworkView(ui.View):
     async def note(self, interaction: discord.Interaction, button: ui.Button):
         if not is_swc(interaction): return await interaction.response.send_message("⛔ SWC Only", ephemeral=True)
         await interaction.response.defer()
+        audit_log.record(interaction.guild_id, 'rework', status='noted', user_id=self.target_user.id if self.target_user else None,
+                         by=interaction.user.id, message_id=interaction.message.id)
         await self.send_dm(interaction, "NOTED")
         new_content = self.original_msg_content.replace("## Rework Report", "## Rework Report [NOTED]")
         self.clear_items()
@@ -555,6 +2928,95 @@ class ReworkView(ui.View):
         await interaction.message.edit(content=new_content, view=self)
         await interaction.followup.send("📝 User notified (Noted).", ephemeral=True)
 
+# --- QUEUE PAGES ---
+# /queue shows QUEUE_PAGE_SIZE entries per page, optionally only one time block.
+# Rendered pages are cached per (guild, block filter, page) and reused until the
+# queue's version changes, so paging back and forth or repeating /queue on an
+# unchanged queue does no work. Rows use mentions, not member lookups.
+QUEUE_PAGE_SIZE = 15
+QUEUE_PAGE_CACHE_SIZE = 256
+
+class QueuePages:
+    def __init__(self, size=QUEUE_PAGE_CACHE_SIZE):
+        self.size = size
+        self._pages = OrderedDict() # (guild_id, time_block, page) -> (queue, version, text)
+        self._matches = {} # (guild_id, time_block) -> (queue, version, [(position, entry), ...])
+        self.hits = 0
+        self.misses = 0
+
+    def _matching(self, guild_id, queue, time_block):
+        cached = self._matches.get((guild_id, time_block))
+        if cached and cached[0] is queue and cached[1] == queue.version:
+            return cached[2]
+        matches = [(pos, entry) for pos, entry in enumerate(queue, 1) if entry.get('time_block') == time_block]
+        self._matches[(guild_id, time_block)] = (queue, queue.version, matches)
+        return matches
+
+    def render(self, guild_id, queue, time_block, page):
+        # Returns (text, page, pages, total), with page clamped to the range
+        matches = self._matching(guild_id, queue, time_block) if time_block else None
+        total = len(matches) if time_block else len(queue)
+        pages = max(1, -(-total // QUEUE_PAGE_SIZE))
+        page = min(max(page, 0), pages - 1)
+        key = (guild_id, time_block, page)
+        cached = self._pages.get(key)
+        if cached and cached[0] is queue and cached[1] == queue.version:
+            self.hits += 1
+            self._pages.move_to_end(key)
+            return cached[2], page, pages, total
+
+        self.misses += 1
+        start = page * QUEUE_PAGE_SIZE
+        if time_block:
+            rows = matches[start:start + QUEUE_PAGE_SIZE]
+        else:
+            rows = enumerate(queue.slice(start, start + QUEUE_PAGE_SIZE), start + 1)
+        text = "\n".join(f"**{pos}.** <@{entry['user_id']}> | Block: `{entry.get('time_block', 'N/A')}` | <t:{entry['time']}:R>"
+                         for pos, entry in rows)
+        self._pages[key] = (queue, queue.version, text)
+        if len(self._pages) > self.size:
+            self._pages.popitem(last=False)
+        return text, page, pages, total
+
+queue_pages = QueuePages()
+
+def queue_embed(guild_id, time_block, page):
+    queue = storage.queue_for(guild_id)
+    text, page, pages, total = queue_pages.render(guild_id, queue, time_block, page)
+    title = "Current Work Queue" + (f" — {time_block}" if time_block else "")
+    embed = discord.Embed(title=title, color=discord.Color.blue())
+    if total:
+        embed.description = f"**As of:** {get_time_tag()}\n\n{text}"
+    else:
+        embed.description = f"No editors waiting in `{time_block}`." if time_block else "The queue is empty."
+    embed.set_footer(text=f"Page {page + 1}/{pages} | {total} of {len(queue)} queued" if time_block else f"Page {page + 1}/{pages} | {total} queued")
+    return embed, page, pages
+
+class QueuePageView(ui.View):
+    def __init__(self, guild_id, time_block, page, pages):
+        super().__init__(timeout=300)
+        self.guild_id = guild_id
+        self.time_block = time_block
+        self.page = page
+        self.update_buttons(pages)
+
+    def update_buttons(self, pages):
+        self.prev_page.disabled = self.page <= 0
+        self.next_page.disabled = self.page >= pages - 1
+
+    async def show(self, interaction, page):
+        embed, self.page, pages = queue_embed(self.guild_id, self.time_block, page)
+        self.update_buttons(pages)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @ui.button(label="◀ Prev", style=discord.ButtonStyle.grey)
+    async def prev_page(self, interaction: discord.Interaction, button: ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @ui.button(label="Next ▶", style=discord.ButtonStyle.grey)
+    async def next_page(self, interaction: discord.Interaction, button: ui.Button):
+        await self.show(interaction, self.page + 1)
+
 # --- HELP SYSTEM ---
 class HelpSelect(discord.ui.Select):
     def __init__(self):
@@ -572,17 +3034,26 @@ class HelpSelect(discord.ui.Select):
             embed.description = "**General Commands**"
             embed.add_field(name="/available", value="Add yourself to the work queue with a time block.", inline=False)
             embed.add_field(name="/optout", value="Remove yourself from the queue.", inline=False)
-            embed.add_field(name="/tattimer", value="Calculate TAT deadlines for a specific file length.", inline=False)
+            embed.add_field(name="/tattimer", value="Calculate TAT deadlines for a file length, or for many at once (comma-separated lengths or a CSV upload).", inline=False)
+            embed.add_field(name="/filedone", value="Mark your assigned file as done (stops TAT tracking).", inline=False)
             embed.add_field(name="Text Command: 'available'", value="Type `available` in chat to join queue (Legacy).", inline=False)
         
         elif self.values[0] == "SWC Commands":
             embed.description = "**SWC / Admin Commands**"
             embed.add_field(name="/assign", value="Assign a file to a user (starts TAT timer).", inline=False)
-            embed.add_field(name="/queue", value="View the current waiting list.", inline=False)
+            embed.add_field(name="/assignbatch", value="Assign a list of files to the next editors in the queue (FIFO).", inline=False)
+            embed.add_field(name="/addfile", value="Add a file to the backlog for automatic assignment (Live files first).", inline=False)
+            embed.add_field(name="/backlog", value="View pending files, who they will go to, and dispatch stats.", inline=False)
+            embed.add_field(name="/dropfile", value="Remove a file from the backlog.", inline=False)
+            embed.add_field(name="/queue", value="View the waiting list, 15 per page, optionally for one time block.", inline=False)
             embed.add_field(name="/remove", value="Force remove a user from the queue.", inline=False)
             embed.add_field(name="/resetqueue", value="Clear the entire queue.", inline=False)
             embed.add_field(name="/askfileupdate", value="Ping a user asking for a status update.", inline=False)
             embed.add_field(name="/setlogchannels", value="Create and link all required log channels.", inline=False)
+            embed.add_field(name="/setcooldown", value="Set the wait between an editor's queue join requests.", inline=False)
+            embed.add_field(name="/settatrule", value="Change the TAT multipliers or fixed TAT for a file type.", inline=False)
+            embed.add_field(name="/queuestats", value="Wait-time percentiles per time block, top editors and queue depth.", inline=False)
+            embed.add_field(name="/perf", value="Show slow handlers and loop-blocking callbacks (when profiling is on).", inline=False)
             embed.add_field(name="Context Menus", value="Right Click User > Apps > Assign, Remove, etc.", inline=False)
             embed.add_field(name="Emoji Reactions", value="React with custom emojis (:QB:, :AL:, etc) to instantly assign files.", inline=False)
 
@@ -605,8 +3076,33 @@ class HelpView(discord.ui.View):
 # --- BOT SETUP ---
 class MyBot(commands.Bot):
     async def setup_hook(self):
+        # State is loaded exactly once, before the gateway connects. on_ready
+        # fires again after every reconnect and must never reload it: that
+        # would drop mutations the writer hasn't flushed yet.
+        load_data()
+        queue_stats.attach(storage)
+        audit_log.start()
+        scheduler.load()
         self.add_view(RevertView(None, ""))
         self.add_view(ReworkView(None, ""))
+        self.add_dynamic_items(ReceiptButton)
+        profiler.install(self, dynamic_items=(ReceiptButton,))
+        persistence.start()
+        dispatcher.start()
+        scheduler.start()
+        try:
+            await health.start()
+        except OSError as e:
+            print(f"Health server not started on port {health.port}: {e}")
+
+    async def close(self):
+        # Flush-on-shutdown hook: post buffered logs while the connection is
+        # still up, then write out anything still waiting in the writer
+        await log_batcher.close()
+        queue_stats.save_all()
+        await persistence.close()
+        await health.close()
+        await super().close()
 
 intents = discord.Intents.default()
 intents.members = True 
@@ -614,14 +3110,97 @@ intents.message_content = True
 
 bot = MyBot(command_prefix="fd!", intents=intents, help_command=None)
 
+@bot.event
+async def on_connect():
+    health.gateway_connected = True
+
+@bot.event
+async def on_resumed():
+    health.gateway_connected = True
+
+@bot.event
+async def on_disconnect():
+    if health.gateway_connected:
+        health.disconnects += 1
+    health.gateway_connected = False
+
 @bot.event
 async def on_ready():
-    load_data()
-    print(f'Logged in as {bot.user}')
+    # Channel objects may have been replaced while we were disconnected
+    log_router.invalidate()
+    if 'ready' in startup_timings:
+        print(f"Reconnected as {bot.user}")
+        return
+    startup_timings['ready'] = time.perf_counter() - PROCESS_STARTED
+
+    # Entries saved before queues were per guild can only be placed safely
+    # when the bot is in exactly one guild
+    if storage.queue_for(LEGACY_GUILD_ID):
+        if len(bot.guilds) == 1:
+            moved = await queue_executor.submit(bot.guilds[0].id, storage.adopt_legacy_queue, bot.guilds[0].id)
+            print(f"Moved {moved} legacy queue entries to {bot.guilds[0].name}.")
+        else:
+            print(f"{len(storage.queue_for(LEGACY_GUILD_ID))} legacy queue entries are not tied to a guild; left in bucket {LEGACY_GUILD_ID}.")
+    # Replays of the audit log start from these snapshots
+    for guild in bot.guilds:
+        await queue_executor.submit(guild.id, audit_log.baseline, guild.id)
+    print(f"Logged in as {bot.user} (ready {startup_timings['ready']:.2f}s after start, state loaded in {startup_timings['load'] * 1000:.1f} ms)")
+
+# --- CHANNEL LISTENERS ---
+# Log routes hold channel objects, so rebuild a guild's routes whenever its
+# channels change
+@bot.event
+async def on_guild_channel_create(channel):
+    log_router.invalidate(channel.guild.id)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    log_router.invalidate(channel.guild.id)
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    log_router.invalidate(after.guild.id)
 
 # --- REACTION LISTENER ---
+# Command timing: the tree dispatches commands in its own task, so the start is
+# taken when the interaction arrives and matched up on completion or error.
+command_started = {} # interaction id -> perf_counter at arrival
+
+def observe_command(interaction, command, outcome):
+    started = command_started.pop(interaction.id, None)
+    if started is None or command is None:
+        return
+    kind = "context_menu" if isinstance(command, app_commands.ContextMenu) else "slash"
+    metrics.observe("fdbot_command_seconds", time.perf_counter() - started,
+                    command=command.name, type=kind, outcome=outcome)
+
+@bot.event
+async def on_interaction(interaction):
+    if interaction.type == discord.InteractionType.application_command:
+        command_started[interaction.id] = time.perf_counter()
+
+@bot.event
+async def on_app_command_completion(interaction, command):
+    observe_command(interaction, command, "ok")
+
+@bot.tree.error
+async def on_app_command_error(interaction, error):
+    command = interaction.command
+    observe_command(interaction, command, "error")
+    metrics.inc("fdbot_command_errors_total", command=command.name if command else "unknown")
+    print(f"Command {command.name if command else '?'} failed: {error}")
+    traceback.print_exception(type(error), error, error.__traceback__)
+
 @bot.event
 async def on_raw_reaction_add(payload):
+    started = time.perf_counter()
+    outcome = await handle_reaction(payload)
+    if outcome:
+        metrics.observe("fdbot_reaction_assign_seconds", time.perf_counter() - started, outcome=outcome)
+
+# Returns the outcome label for the metrics, or None for reactions that are
+# not assignment emoji at all.
+async def handle_reaction(payload):
     if payload.user_id == bot.user.id: return
     if not payload.guild_id: return
 
@@ -632,18 +3211,25 @@ async def on_raw_reaction_add(payload):
     member = payload.member or guild.get_member(payload.user_id)
     
     if not check_swc_role(member):
-        return 
+        return "not_swc"
 
     channel = bot.get_channel(payload.channel_id)
-    try:
-        message = await channel.fetch_message(payload.message_id)
-    except:
-        return
+    editor = available_index.lookup(payload.message_id)
+    outcome = "assigned"
+    if editor is None:
+        try:
+            message = await channel.fetch_message(payload.message_id)
+        except:
+            return "fetch_failed"
 
-    if message.author.bot: return 
+        if message.author.bot: return "bot_message"
+        editor = message.author
+        available_index.remember(message.id, editor)
+        outcome = "assigned_after_fetch"
 
     file_type = EMOJI_MAP[emoji_name]
-    await assign_logic(message.author, file_type, channel, member, file_name=None, audio_length=None)
+    await assign_logic(editor, file_type, channel, member, file_name=None, audio_length=None)
+    return outcome
 
 # --- HELP COMMANDS ---
 @bot.tree.command(name="help", description="Show the help menu")
@@ -675,13 +3261,70 @@ async def sync(ctx, option: str = None):
     except Exception as e:
         await msg.edit(content=f"❌ Sync failed: {e}")
 
+@bot.command(name="timings")
+async def timings(ctx):
+    if not any(role.id in SWC_ROLE_IDS for role in ctx.author.roles) and not ctx.author.guild_permissions.administrator:
+        await ctx.send("⛔ You do not have permission to view timings.")
+        return
+    await ctx.send(f"```\n{outbound.report() or 'No sends recorded yet.'}\n```")
+    await ctx.send(f"{available_index.report()}\n{cooldowns.report()}\n"
+                   f"startup: state loaded in {startup_timings.get('load', 0) * 1000:.1f} ms, ready after {startup_timings.get('ready', 0):.2f} s")
+    misses = log_router.report()
+    if misses:
+        await ctx.send(f"Log routing misses:\n```\n{misses}\n```")
+
+@bot.tree.command(name="perf", description="Show handler latency and slow-callback report")
+@app_commands.describe(reset="Clear the collected numbers after showing them")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def perf(interaction: discord.Interaction, reset: bool = False):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+    if not profiler.enabled:
+        await interaction.response.send_message("Profiling is off. Start the bot with `PROFILE_HANDLERS=1` to collect handler timings.", ephemeral=True)
+        return
+
+    embed = discord.Embed(title="Handler Performance", color=discord.Color.blue())
+    embed.description = f"```\n{profiler.report()[:4000]}\n```" if profiler.handlers else "No handlers have run yet."
+    slow = profiler.slow_report()
+    if slow:
+        embed.add_field(name=f"Slowest {PROFILE_TOP_N} calls", value=slow[:1024], inline=False)
+    blocks = profiler.block_report()
+    if blocks:
+        embed.add_field(name=f"Loop blocked > {PROFILE_BLOCK_THRESHOLD * 1000:.0f} ms", value=blocks[:1024], inline=False)
+    embed.set_footer(text=f"Since {datetime.fromtimestamp(profiler.since, timezone.utc):%Y-%m-%d %H:%M} UTC | wall = own code + awaits; api counts Discord REST time")
+    if reset:
+        profiler.reset()
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.event
 async def on_message(message):
     if message.author.bot: return
 
     # --- DUPLICATE "AVAILABLE" CHECK ---
-    if message.content.strip().lower() == "available":
-        existing_entry = next((item for item in work_queue if item['user_id'] == message.author.id), None)
+    if message.guild and message.content.strip().lower() == "available":
+        retry_at = cooldowns.acquire(message.guild.id, message.author.id, join_cooldown(message.guild.id))
+        if retry_at:
+            try:
+                await message.delete(delay=3)
+            except:
+                pass
+            try:
+                await outbound.send(LANE_USER, "dm:cooldown", message.author.send, f"⏳ Please wait. You can request a file again <t:{int(retry_at)}:R>.")
+            except:
+                pass
+            return
+
+        available_index.remember(message.id, message.author)
+        entry = {
+            'user_id': message.author.id,
+            'name': message.author.display_name,
+            'time': int(datetime.now().timestamp()),
+            'time_block': "Unspecified",
+            'jump_url': message.jump_url
+        }
+        existing_entry, queue_pos = await queue_executor.submit(message.guild.id, join_queue, message.guild.id, entry)
         
         if existing_entry:
             try:
@@ -695,25 +3338,14 @@ async def on_message(message):
                 f"Please avoid sending multiple requests for files and ensure you are requesting files within your assigned time block."
             )
             try:
-                await message.author.send(warn_msg)
+                await outbound.send(LANE_USER, "dm:duplicate", message.author.send, warn_msg)
             except:
                 pass 
             return 
 
         # --- TEXT COMMAND (Legacy Support) ---
-        entry = {
-            'user_id': message.author.id,
-            'name': message.author.display_name,
-            'time': int(datetime.now().timestamp()),
-            'time_block': "Unspecified",
-            'jump_url': message.jump_url
-        }
-        work_queue.append(entry)
-        save_queue()
-        
         await message.reply(f"👋🏼 {message.author.mention} is available for a file.\n-# - Requesting Editor's Default Time Block is Unspecified.", mention_author=True)
         
-        queue_pos = len(work_queue)
         time_tag = get_time_tag()
         dm_content = (
             f"# Hello {message.author.mention}!\n"
@@ -726,7 +3358,7 @@ async def on_message(message):
             f"- If your block is revised and approved, you may only receive audio project assignments if there is a surplus in the queue during your updated availability window."
         )
         try:
-            await message.author.send(dm_content)
+            await outbound.send(LANE_USER, "dm:available", message.author.send, dm_content)
         except:
             pass
         
@@ -792,8 +3424,8 @@ async def set_log_channels(interaction: discord.Interaction):
         config_update[key] = channel.id
 
     # 4. Save to Config
-    server_configs[str(guild.id)] = config_update
-    save_config()
+    storage.set_guild_config(guild.id, config_update)
+    log_router.invalidate(guild.id)
     
     await interaction.followup.send(
         f"✅ Setup Complete!\n"
@@ -804,16 +3436,25 @@ async def set_log_channels(interaction: discord.Interaction):
         ephemeral=True
     )
 
-@bot.tree.command(name="tattimer", description="Calculate TAT deadlines for a file")
-@app_commands.describe(file_type="Type of file", audio_length="Duration as HH:MM:SS")
+@bot.tree.command(name="tattimer", description="Calculate TAT deadlines for a file (or a batch of files)")
+@app_commands.describe(
+    file_type="Type of file",
+    audio_length="Duration as HH:MM:SS; separate several with commas for a batch",
+    csv_file="Optional: CSV with one file per row (audio length, optional file type and name)"
+)
 @app_commands.choices(file_type=FILE_CHOICES)
-async def tattimer(interaction: discord.Interaction, file_type: app_commands.Choice[str], audio_length: str):
-    total_seconds = parse_audio_time(audio_length)
+async def tattimer(interaction: discord.Interaction, file_type: app_commands.Choice[str], audio_length: str = None, csv_file: discord.Attachment = None):
+    lengths = [part for part in (audio_length or "").split(",") if part.strip()]
+    if csv_file or len(lengths) > 1:
+        await tattimer_batch(interaction, file_type, lengths, csv_file)
+        return
+
+    total_seconds = parse_audio_time(audio_length) if audio_length else None
     if total_seconds is None:
         await interaction.response.send_message("❌ Invalid format. Please use HH:MM:SS (e.g., 01:30:00)", ephemeral=True)
         return
 
-    tats = calculate_tats(file_type.value, total_seconds)
+    tats = calculate_tats(file_type.value, total_seconds, interaction.guild_id)
     ah_decimal = total_seconds / 3600
 
     msg = (
@@ -828,21 +3469,91 @@ async def tattimer(interaction: discord.Interaction, file_type: app_commands.Cho
     )
     await interaction.response.send_message(msg, ephemeral=True)
 
+async def tattimer_batch(interaction, file_type, lengths, csv_file):
+    rows = [[length] for length in lengths]
+    if csv_file:
+        if csv_file.size > 1_000_000:
+            await interaction.response.send_message("❌ CSV files must be under 1 MB.", ephemeral=True)
+            return
+        try:
+            text = (await csv_file.read()).decode("utf-8-sig")
+        except UnicodeDecodeError:
+            await interaction.response.send_message("❌ The CSV file must be UTF-8 text.", ephemeral=True)
+            return
+        rows += list(csv.reader(io.StringIO(text)))
+
+    files, skipped = parse_tat_batch(rows, file_type.value)
+    if not files:
+        await interaction.response.send_message("❌ No audio lengths found. Use HH:MM:SS (e.g., 01:30:00).", ephemeral=True)
+        return
+    if len(files) > TAT_BATCH_MAX:
+        await interaction.response.send_message(f"❌ A batch can hold at most {TAT_BATCH_MAX} files ({len(files)} given).", ephemeral=True)
+        return
+
+    report = tat_batch_csv(files, interaction.guild_id)
+    total_hours = sum(total_seconds for *_, total_seconds in files) / 3600
+    msg = f"# TAT Calculator (Batch)\n**`Files:`** {len(files)}\n**`Total Audio Hours:`** {total_hours:.2f}"
+    if skipped:
+        msg += f"\n-# Skipped {skipped} row(s) without a valid audio length."
+    await interaction.response.send_message(msg, file=discord.File(io.BytesIO(report.encode()), filename="tat_deadlines.csv"), ephemeral=True)
+
+@bot.tree.command(name="settatrule", description="Override how TATs are calculated for a file type")
+@app_commands.describe(
+    file_type="File type the rule applies to",
+    fr="FR TAT as a multiple of the audio length (0 = N/A)",
+    sv="SV TAT as a multiple of the audio length (0 = N/A)",
+    overall="Overall TAT as a multiple of the audio length",
+    fixed_overall_minutes="Optional: fixed overall TAT in minutes, regardless of length",
+    reset="Go back to the built-in rule for this file type"
+)
+@app_commands.choices(file_type=FILE_CHOICES)
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def set_tat_rule(interaction: discord.Interaction, file_type: app_commands.Choice[str], fr: float = None, sv: float = None,
+                       overall: float = None, fixed_overall_minutes: int = None, reset: bool = False):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+
+    rules = dict(storage.guild_setting(interaction.guild_id, 'tat_rules') or {})
+    if reset:
+        rules.pop(file_type.value, None)
+    else:
+        base = DEFAULT_TAT_RULES.get(file_type.value, DEFAULT_TAT_RULES["default"])
+        rule = dict(rules.get(file_type.value, base))
+        for stage, value in (("FR", fr), ("SV", sv), ("OVERALL", overall)):
+            if value is not None:
+                rule[stage] = value
+        if fixed_overall_minutes is not None:
+            rule["fixed"] = {"OVERALL": fixed_overall_minutes * 60} if fixed_overall_minutes > 0 else {}
+        elif overall is not None:
+            rule.pop("fixed", None)
+        rules[file_type.value] = rule
+    storage.set_guild_setting(interaction.guild_id, 'tat_rules', rules)
+
+    example = calculate_tats(file_type.value, 3600, interaction.guild_id)
+    await interaction.response.send_message(
+        f"✅ TAT rule for **{file_type.name}** {'reset' if reset else 'updated'}.\n"
+        f"For 1 hour of audio: FR {example['FR']} | SV {example['SV']} | OVERALL {example['OVERALL']}", ephemeral=True)
+
 @bot.tree.command(name="available", description="Add yourself to the work queue")
 @app_commands.describe(time_block="Choose your default time block as indicated in the sheets")
 @app_commands.choices(time_block=TIME_BLOCK_CHOICES)
+@app_commands.guild_only()
 async def available(interaction: discord.Interaction, time_block: app_commands.Choice[str]):
-    last_used = available_cooldowns.get(interaction.user.id, 0)
-    now_ts = datetime.now().timestamp()
-    
-    if now_ts - last_used < 600: # 10 Minutes
-        future_time = int(last_used + 600)
-        await interaction.response.send_message(f"⏳ Please wait. You can use this again <t:{future_time}:R>.", ephemeral=True)
+    retry_at = cooldowns.acquire(interaction.guild_id, interaction.user.id, join_cooldown(interaction.guild_id))
+    if retry_at:
+        await interaction.response.send_message(f"⏳ Please wait. You can use this again <t:{int(retry_at)}:R>.", ephemeral=True)
         return
-        
-    available_cooldowns[interaction.user.id] = now_ts
 
-    existing_entry = next((item for item in work_queue if item['user_id'] == interaction.user.id), None)
+    # Reserve the queue spot first; the jump URL is filled in once the public
+    # message exists, so a removal in between is never undone
+    existing_entry, queue_pos = await queue_executor.submit(interaction.guild_id, join_queue, interaction.guild_id, {
+        'user_id': interaction.user.id,
+        'name': interaction.user.display_name,
+        'time': int(datetime.now().timestamp()),
+        'time_block': time_block.value
+    })
     if existing_entry:
         queue_link = existing_entry.get('jump_url', 'the queue channel')
         warn_msg = (
@@ -852,19 +3563,16 @@ async def available(interaction: discord.Interaction, time_block: app_commands.C
         await interaction.response.send_message(warn_msg, ephemeral=True)
         return
 
-    await interaction.response.send_message(f"👋🏼 {interaction.user.mention} is available for a file.\n-# - Requesting Editor's Default Time Block is {time_block.value}.")
-    msg = await interaction.original_response()
-    
-    work_queue.append({
-        'user_id': interaction.user.id,
-        'name': interaction.user.display_name,
-        'time': int(datetime.now().timestamp()),
-        'time_block': time_block.value,
-        'jump_url': msg.jump_url
-    })
-    save_queue()
+    try:
+        await interaction.response.send_message(f"👋🏼 {interaction.user.mention} is available for a file.\n-# - Requesting Editor's Default Time Block is {time_block.value}.")
+        msg = await interaction.original_response()
+    except Exception:
+        await queue_executor.submit(interaction.guild_id, leave_queue, interaction.guild_id, interaction.user.id, 'rollback')
+        raise
+    # Reacting to the announcement assigns the editor who ran the command
+    available_index.remember(msg.id, interaction.user)
+    await queue_executor.submit(interaction.guild_id, update_queue_entry, interaction.guild_id, interaction.user.id, {'jump_url': msg.jump_url})
     
-    queue_pos = len(work_queue)
     time_tag = get_time_tag()
     dm_content = (
         f"# Hello {interaction.user.mention}!\n"
@@ -877,7 +3585,7 @@ async def available(interaction: discord.Interaction, time_block: app_commands.C
         f"- If your block is revised and approved, you may only receive audio project assignments if there is a surplus in the queue during your updated availability window."
     )
     try:
-        await interaction.user.send(dm_content)
+        await outbound.send(LANE_USER, "dm:available", interaction.user.send, dm_content)
     except:
         pass
         
@@ -886,12 +3594,9 @@ async def available(interaction: discord.Interaction, time_block: app_commands.C
     await send_log(interaction.guild, "availability", embed=log_embed)
 
 @bot.tree.command(name="optout", description="Remove yourself from the queue")
+@app_commands.guild_only()
 async def optout(interaction: discord.Interaction):
-    global work_queue
-    original_len = len(work_queue)
-    work_queue = [item for item in work_queue if item['user_id'] != interaction.user.id]
-    save_queue()
-    if len(work_queue) < original_len:
+    if await queue_executor.submit(interaction.guild_id, leave_queue, interaction.guild_id, interaction.user.id, 'optout'):
         await interaction.response.send_message("You have removed yourself from the queue.", ephemeral=True)
         log_embed = discord.Embed(description=f"📤 {interaction.user.mention} opted out of queue.", color=discord.Color.light_grey())
         await send_log(interaction.guild, "availability", embed=log_embed)
@@ -899,35 +3604,25 @@ async def optout(interaction: discord.Interaction):
         await interaction.response.send_message("You were not in the queue.", ephemeral=True)
 
 @bot.tree.command(name="queue", description="Show the current waiting list")
+@app_commands.describe(time_block="Only show editors in this time block", page="Page to open (default 1)")
+@app_commands.choices(time_block=TIME_BLOCK_CHOICES)
 @app_commands.default_permissions(administrator=True)
 @app_commands.guild_only() 
-async def show_queue(interaction: discord.Interaction):
+async def show_queue(interaction: discord.Interaction, time_block: app_commands.Choice[str] = None, page: app_commands.Range[int, 1] = 1):
     if not is_swc(interaction):
         await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
         return
-    
-    await interaction.response.defer(ephemeral=True)
 
-    if not work_queue:
-        await interaction.followup.send("The queue is empty.", ephemeral=True)
+    if not storage.queue_for(interaction.guild_id):
+        await interaction.response.send_message("The queue is empty.", ephemeral=True)
         return
-    
-    current_time_tag = get_time_tag()
-    embed = discord.Embed(title="Current Work Queue", color=discord.Color.blue())
-    desc = f"**As of:** {current_time_tag}\n\n"
-    
-    display_limit = 15
-    for idx, item in enumerate(work_queue[:display_limit], 1):
-        member = interaction.guild.get_member(item['user_id'])
-        name_display = member.mention if member else item['name']
-        tb = item.get('time_block', 'N/A')
-        desc += f"**{idx}.** {name_display} | Block: `{tb}` | <t:{item['time']}:R>\n"
-        
-    if len(work_queue) > display_limit:
-        desc += f"\n...and {len(work_queue) - display_limit} more."
-        
-    embed.description = desc
-    await interaction.followup.send(embed=embed, ephemeral=True)
+
+    block = time_block.value if time_block else None
+    embed, page, pages = queue_embed(interaction.guild_id, block, page - 1)
+    if pages > 1:
+        await interaction.response.send_message(embed=embed, view=QueuePageView(interaction.guild_id, block, page, pages), ephemeral=True)
+    else:
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="remove", description="Remove a specific user from the queue")
 @app_commands.default_permissions(administrator=True)
@@ -936,20 +3631,10 @@ async def remove_user(interaction: discord.Interaction, member: discord.Member):
     if not is_swc(interaction):
         await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
         return
-    global work_queue
-    
-    found = False
-    for item in work_queue:
-        if item['user_id'] == member.id:
-            found = True
-            break
-            
-    if not found:
+    if not await queue_executor.submit(interaction.guild_id, leave_queue, interaction.guild_id, member.id, 'remove'):
         await interaction.response.send_message(f"❌ {member.mention} is not in the queue.", ephemeral=True)
         return
 
-    work_queue = [item for item in work_queue if item['user_id'] != member.id]
-    save_queue()
     await interaction.response.send_message(f"✔️ Removed {member.mention} from the queue.", ephemeral=True)
     
     log_embed = discord.Embed(title="User Removed from Queue", color=discord.Color.red())
@@ -964,8 +3649,7 @@ async def reset_queue(interaction: discord.Interaction):
     if not is_swc(interaction):
         await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
         return
-    work_queue.clear()
-    save_queue()
+    await queue_executor.submit(interaction.guild_id, reset_guild_queue, interaction.guild_id)
     time_tag = get_time_tag()
     await interaction.response.send_message(f"🔄 The queue has been reset as of {time_tag}", ephemeral=False)
     
@@ -986,6 +3670,122 @@ async def assign(interaction: discord.Interaction, member: discord.Member, file_
     await assign_logic(member, file_type.value, interaction.channel, interaction.user, file_name, audio_length)
     await interaction.followup.send("Assignment processed.", ephemeral=False)
 
+@bot.tree.command(name="assignbatch", description="Assign a list of files to the next editors in the queue")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def assignbatch(interaction: discord.Interaction):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+    await interaction.response.send_modal(AssignBatchModal())
+
+@bot.tree.command(name="addfile", description="Add a file to the backlog; it is assigned to the next eligible editor")
+@app_commands.describe(file_name="Optional: Name of the file", audio_length="Optional: HH:MM:SS")
+@app_commands.choices(file_type=FILE_CHOICES)
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def add_file(interaction: discord.Interaction, file_type: app_commands.Choice[str], file_name: str = None, audio_length: str = None):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+    if audio_length and parse_audio_time(audio_length) is None:
+        await interaction.response.send_message("❌ Audio length must be HH:MM:SS or MM:SS.", ephemeral=True)
+        return
+
+    file = {
+        'id': uuid.uuid4().hex[:8],
+        'file_type': file_type.value,
+        'file_name': file_name,
+        'audio_length': audio_length,
+        'added_by': interaction.user,
+        'added_at': time.time(),
+        'channel': interaction.channel
+    }
+    dispatcher.add(interaction.guild_id, file)
+    pending = len(file_backlog.pending(interaction.guild_id))
+    await interaction.response.send_message(f"📥 Added **{file_type.value}** to the backlog (file `{file['id']}`, {pending} pending).", ephemeral=True)
+
+@bot.tree.command(name="backlog", description="Show pending files and dispatch stats")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def show_backlog(interaction: discord.Interaction):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+
+    pending = file_backlog.pending(interaction.guild_id)
+    planned = {file['id']: member for file, member in file_backlog.plan(interaction.guild)}
+    embed = discord.Embed(title="File Backlog", color=discord.Color.blue())
+    desc = ""
+    display_limit = 15
+    for idx, file in enumerate(pending[:display_limit], 1):
+        name = f" — {file['file_name']}" if file['file_name'] else ""
+        desc += f"**{idx}.** `{file['id']}` {file['file_type']}{name} | <t:{int(file['added_at'])}:R>"
+        if file['id'] in planned:
+            desc += f" → {planned[file['id']].mention}"
+        desc += "\n"
+    if len(pending) > display_limit:
+        desc += f"\n...and {len(pending) - display_limit} more."
+    embed.description = desc or "No pending files."
+    if pending:
+        embed.add_field(name="⚠️ Not saved", value="Pending files are kept in memory only; a bot restart drops them and they must be re-added with /addfile.", inline=False)
+    embed.set_footer(text=dispatcher.report())
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="queuestats", description="Show queue wait times, assignment counts and queue depth")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def queuestats(interaction: discord.Interaction):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+
+    stats = queue_stats.guilds.get(interaction.guild_id)
+    if stats is None:
+        await interaction.response.send_message("No queue activity recorded yet.", ephemeral=True)
+        return
+
+    def wait(seconds):
+        return format_seconds(seconds) if seconds >= 1 else "< 1s"
+
+    embed = discord.Embed(title="Queue Stats", color=discord.Color.blue())
+    blocks = sorted(stats.waits.items(), key=lambda kv: kv[1].count, reverse=True)
+    embed.description = "\n".join(
+        f"**{block}** ({sketch.count} assigned): p50 {wait(sketch.quantile(0.5))} | "
+        f"p90 {wait(sketch.quantile(0.9))} | p99 {wait(sketch.quantile(0.99))}"
+        for block, sketch in blocks[:10]
+    ) or "No editors assigned from the queue yet."
+
+    top_editors = sorted(stats.by_editor.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    if top_editors:
+        embed.add_field(name="Top Editors", value="\n".join(f"<@{uid}>: {n}" for uid, n in top_editors), inline=True)
+    if stats.by_type:
+        by_type = sorted(stats.by_type.items(), key=lambda kv: kv[1], reverse=True)
+        embed.add_field(name="By File Type", value="\n".join(f"{ft}: {n}" for ft, n in by_type[:10]), inline=True)
+
+    hourly = [(hour, stats.depth_area[hour] / stats.depth_time[hour]) for hour in range(24) if stats.depth_time[hour]]
+    busiest = sorted(hourly, key=lambda h: h[1], reverse=True)[:3]
+    depth = f"Now: {stats.depth} | Max: {stats.max_depth}"
+    if busiest:
+        depth += "\nBusiest (avg): " + ", ".join(f"{hour:02d}:00 EST {avg:.1f}" for hour, avg in busiest)
+    embed.add_field(name="Queue Depth", value=depth, inline=False)
+    embed.set_footer(text=f"Since {datetime.fromtimestamp(stats.since, EST):%Y-%m-%d} | quantiles within {QUANTILE_ACCURACY:.0%}")
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="dropfile", description="Remove a file from the backlog")
+@app_commands.describe(file_id="The file id shown by /backlog")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def drop_file(interaction: discord.Interaction, file_id: str):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+    file = await queue_executor.submit(interaction.guild_id, file_backlog.drop, interaction.guild_id, file_id.strip())
+    if file:
+        await interaction.response.send_message(f"🗑️ Removed **{file['file_type']}** (`{file_id}`) from the backlog.", ephemeral=True)
+    else:
+        await interaction.response.send_message(f"No pending file `{file_id}`.", ephemeral=True)
+
 @bot.tree.command(name="askfileupdate", description="Ask a user for an update on their file")
 @app_commands.default_permissions(administrator=True)
 @app_commands.guild_only() 
@@ -1005,8 +3805,12 @@ async def reassign_notif(interaction: discord.Interaction, member: discord.Membe
     if not is_swc(interaction):
         await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
         return
+    # The file is someone else's now; stop tracking the old editor's deadlines
+    for record in deadline_tracker.open_for(interaction.guild_id, member.id):
+        deadline_tracker.complete(record['id'])
+    audit_log.record(interaction.guild_id, 'reassign_notice', user_id=member.id, by=interaction.user.id)
     try:
-        await member.send(f"⚠️ {member.mention}, your file has been REASSIGNED due to inactivity.")
+        await outbound.send(LANE_USER, "dm:reassign", member.send, f"⚠️ {member.mention}, your file has been REASSIGNED due to inactivity.")
         await interaction.response.send_message(f"✅ Notification sent to {member.mention}.", ephemeral=True)
         
         log_embed = discord.Embed(title="Reassignment Notice Sent", color=discord.Color.orange())
@@ -1016,6 +3820,43 @@ async def reassign_notif(interaction: discord.Interaction, member: discord.Membe
     except discord.Forbidden:
         await interaction.response.send_message(f"❌ Could not DM {member.mention}.", ephemeral=True)
 
+@bot.tree.command(name="filedone", description="Mark your assigned file as done")
+@app_commands.describe(file_name="Optional: Name of the file (defaults to your latest assignment)")
+@app_commands.guild_only()
+async def file_done(interaction: discord.Interaction, file_name: str = None):
+    records = deadline_tracker.open_for(interaction.guild_id, interaction.user.id)
+    if file_name:
+        records = [r for r in records if (r['file_name'] or "").lower() == file_name.strip().lower()]
+    if not records:
+        await interaction.response.send_message("You have no tracked files" + (f" named **{file_name}**." if file_name else "."), ephemeral=True)
+        return
+
+    record = records[0]
+    deadline_tracker.complete(record['id'])
+    late = int(time.time()) > record['due_at']
+    await interaction.response.send_message(f"✅ Marked **{record['file_name'] or record['file_type']}** as done.", ephemeral=True)
+
+    log_embed = discord.Embed(title="File Completed", color=discord.Color.red() if late else discord.Color.green())
+    log_embed.add_field(name="Editor", value=interaction.user.mention, inline=True)
+    log_embed.add_field(name="File Type", value=record['file_type'], inline=True)
+    if record['file_name']: log_embed.add_field(name="File Name", value=record['file_name'], inline=False)
+    log_embed.add_field(name="Overall Due", value=f"<t:{record['due_at']}:R>", inline=True)
+    log_embed.set_footer(text="Completed after the TAT" if late else "Completed within TAT")
+    await send_log(interaction.guild, "fileupdate", embed=log_embed)
+
+@bot.tree.command(name="setcooldown", description="Set how long editors wait between queue join requests")
+@app_commands.describe(minutes="Minutes between requests (0 turns the cooldown off)")
+@app_commands.default_permissions(administrator=True)
+@app_commands.guild_only()
+async def set_cooldown(interaction: discord.Interaction, minutes: app_commands.Range[int, 0, 1440]):
+    if not is_swc(interaction):
+        await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
+        return
+    storage.set_guild_setting(interaction.guild_id, 'join_cooldown', minutes * 60)
+    rejected = cooldowns.rejected.get(interaction.guild_id, 0)
+    await interaction.response.send_message(
+        f"✅ Join cooldown set to **{minutes} minute(s)**. ({rejected} request(s) rejected by the cooldown so far.)", ephemeral=True)
+
 # --- FORM COMMANDS ---
 @bot.tree.command(name="plannedavailability", description="Submit planned availability change")
 async def planned(interaction: discord.Interaction):
@@ -1055,20 +3896,10 @@ async def context_remove(interaction: discord.Interaction, member: discord.Membe
     if not is_swc(interaction):
         await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
         return
-    global work_queue
-    
-    found = False
-    for item in work_queue:
-        if item['user_id'] == member.id:
-            found = True
-            break
-            
-    if not found:
+    if not await queue_executor.submit(interaction.guild_id, leave_queue, interaction.guild_id, member.id, 'remove'):
         await interaction.response.send_message(f"❌ {member.mention} is not in the queue.", ephemeral=True)
         return
 
-    work_queue = [item for item in work_queue if item['user_id'] != member.id]
-    save_queue()
     await interaction.response.send_message(f"✔️ Removed {member.mention} from the queue.", ephemeral=True)
     
     log_embed = discord.Embed(title="User Removed (Context Menu)", color=discord.Color.red())
@@ -1095,24 +3926,20 @@ async def context_add_queue(interaction: discord.Interaction, member: discord.Me
         await interaction.response.send_message("⛔ SWC Access Only.", ephemeral=True)
         return
 
-    global work_queue
-    if any(item['user_id'] == member.id for item in work_queue):
-        await interaction.response.send_message(f"{member.mention} is already in the queue!", ephemeral=True)
-        return
-
     default_tb = "Assigned by Admin"
 
-    work_queue.append({
+    existing_entry, queue_pos = await queue_executor.submit(interaction.guild_id, join_queue, interaction.guild_id, {
         'user_id': member.id,
         'name': member.display_name,
         'time': int(datetime.now().timestamp()),
         'time_block': default_tb
     })
-    save_queue()
+    if existing_entry:
+        await interaction.response.send_message(f"{member.mention} is already in the queue!", ephemeral=True)
+        return
 
     await interaction.response.send_message(f"👋🏼 {member.mention} is added to the queue.", ephemeral=True)
 
-    queue_pos = len(work_queue)
     time_tag = get_time_tag()
     dm_content = (
         f"You are added to the [Queue Status](https://discord.com/channels/{interaction.guild_id}). As of {time_tag}, you are at queue #{queue_pos}.\n\n"
@@ -1122,7 +3949,7 @@ async def context_add_queue(interaction: discord.Interaction, member: discord.Me
         f"- Please be reminded of our *[Reminder on Eligibility for Audio Project Assignments](https://discord.com/channels/1391591320677519431/1391595956247728219/1450362680966774805).*"
     )
     try:
-        await member.send(dm_content)
+        await outbound.send(LANE_USER, "dm:added", member.send, dm_content)
     except:
         pass
 
@@ -1142,6 +3969,7 @@ async def rework_report(interaction: discord.Interaction):
     await interaction.response.send_modal(ReworkReportModal())
 
 # START
-keep_alive()
-if TOKEN:
-    bot.run(TOKEN)
+if __name__ == "__main__":
+    if TOKEN:
+        bot.run(TOKEN)
+    persistence.flush_sync()
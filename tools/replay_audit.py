@@ -0,0 +1,67 @@
+# Rebuilds queue state from the local audit log, without touching Discord.
+#
+#   python tools/replay_audit.py [--dir audit] [--at "2026-10-01 14:30"] [--guild ID] [--json]
+#
+# Run from the bot's working directory (where audit/ lives). --at takes an ISO
+# date/time in UTC or a Unix timestamp and replays events up to that moment;
+# without it the replay runs to the end of the log. Prints each guild's queue
+# in order and a count of events by type.
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import AUDIT_DIR, read_audit_events, replay_audit
+
+def parse_at(value):
+    try:
+        return float(value)
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.timestamp()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild queue state from the audit log")
+    parser.add_argument("--dir", default=AUDIT_DIR)
+    parser.add_argument("--at", type=parse_at, default=None, help="UTC date/time or Unix timestamp")
+    parser.add_argument("--guild", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the rebuilt queues as JSON")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"No audit log at {args.dir}")
+        return 1
+
+    counts = Counter()
+    def counted(events):
+        for event in events:
+            if args.guild is None or event['guild_id'] == args.guild:
+                counts[event['event']] += 1
+                yield event
+
+    queues, assignments = replay_audit(counted(read_audit_events(args.dir, args.at)))
+    if args.guild is not None:
+        queues = {args.guild: queues[args.guild]} if args.guild in queues else {}
+
+    if args.json:
+        print(json.dumps({str(g): q.to_list() for g, q in queues.items()}, indent=2))
+        return 0
+
+    when = datetime.fromtimestamp(args.at, timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC") if args.at else "end of log"
+    print(f"Queue state at {when}")
+    for guild_id, queue in sorted(queues.items()):
+        print(f"\nguild {guild_id}: {len(queue)} queued")
+        for pos, entry in enumerate(queue, 1):
+            joined = datetime.fromtimestamp(entry['time'], timezone.utc).strftime("%Y-%m-%d %H:%M") if entry.get('time') else "?"
+            print(f"  {pos:>3}. {entry.get('name', '?')} ({entry['user_id']}) | {entry.get('time_block', 'N/A')} | joined {joined}")
+    print(f"\n{len(assignments)} assignment(s); events: " + ", ".join(f"{kind}={n}" for kind, n in sorted(counts.items())))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())